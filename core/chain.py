@@ -5,6 +5,7 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from .integrations.openrouter import OpenRouter
 from .integrations.openai import ExtendedOpenAI
+from .integrations.client import FallbackLLM
 from db.hybrid import HybridDB
 
 """
@@ -12,21 +13,32 @@ A LangChain chain that uses OpenRouter LLM for document Q&A.
 
 OpenAI will take precedence over OpenRouter.
 That means just set the openai api key in the .env file and the chain will automatically use that key.
+If both keys are set, OpenRouter is used as fallback when OpenAI keeps failing.
 """
 class DokuragChain:
     
-    def __init__(self, documents_folder: str | None = None):
+    def __init__(self, documents_folder: str | None = None, retrieval_mode: str | None = None,
+                 tenants: list[str] | None = None):
         """Initialize the chain with OpenRouter and OpenAI LLMs.
         
         Args:
             documents_folder: Optional path to a folder containing documents for future retrieval.
+            retrieval_mode: "hybrid" (single Weaviate hybrid query), "fused" (parallel BM25 and
+                vector legs fused on the client) or "small_to_big" (small top-k, neighbouring
+                chunks fetched for the hits). Defaults to RETRIEVAL_MODE from .env or "hybrid".
+            tenants: Optional knowledge bases to search, None searches the global collection.
         """
         load_dotenv()
+
+        self.retrieval_mode = retrieval_mode or os.getenv("RETRIEVAL_MODE", "hybrid")
         
+        providers = []
         if os.getenv("OPENAI_API_KEY") and os.getenv("OPENAI_API_KEY") != "":
-            self.llm = ExtendedOpenAI()
-        else:
-            self.llm = OpenRouter()
+            providers.append(ExtendedOpenAI())
+        if (os.getenv("OPENROUTER_API_KEY") and os.getenv("OPENROUTER_API_KEY") != "") or not providers:
+            providers.append(OpenRouter())
+
+        self.llm = providers[0] if len(providers) == 1 else FallbackLLM(providers)
         
         # Default prompt template for document Q&A
         default_template = """You are a technical support assistant. Answer the question or respond with relevant information. Answer in german.
@@ -61,7 +73,24 @@ class DokuragChain:
             | StrOutputParser()
         )
 
-        self.db = HybridDB(documents_folder=documents_folder)
+        self.db = HybridDB(documents_folder=documents_folder, tenants=tenants)
+
+    def retrieve(self, question: str) -> list:
+        """Retrieve context documents for a question with the configured retrieval mode.
+
+        Args:
+            question: The question to search for
+
+        Returns:
+            List of retrieved documents
+        """
+        if self.retrieval_mode == "fused":
+            return self.db.query_fused(question) or []
+        if self.retrieval_mode == "small_to_big":
+            return self.db.query_small_to_big(question, expand=os.getenv("SMALL_TO_BIG_EXPAND", "neighbours")) or []
+        if self.retrieval_mode == "hybrid":
+            return self.db.query_vectors(question) or []
+        raise ValueError(f"Unknown retrieval mode '{self.retrieval_mode}'. Available: hybrid, fused, small_to_big")
     
     def invoke(self, question: str, documents: list[str] | None = None) -> str:
         """Invoke the chain with a question and optional context.
@@ -80,10 +109,10 @@ class DokuragChain:
         if documents:
             # Load provided docs and build retrieval context
             self.db.load_documents(uploaded_documents=documents)
-            context_docs = self.db.query_vectors(question) or []
+            context_docs = self.retrieve(question)
             
         else:
-            context_docs = self.db.query_vectors(question) or []
+            context_docs = self.retrieve(question)
 
         return self.rag_chain.invoke({
             "question": question,
@@ -0,0 +1,237 @@
+import os
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+import httpx
+from email.utils import parsedate_to_datetime
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError
+
+"""
+Shared LLM client layer used by the OpenAI and OpenRouter integrations.
+
+- pooled httpx client per base url -> connections are reused across chains and calls
+- retries on 429 / 5xx / connection errors with jittered backoff, honouring Retry-After
+  (a Retry-After above max_delay gives up right away, so FallbackLLM moves on to the next provider)
+- TokenBucket -> limits request rate and concurrency, a 429 pauses every caller
+- FallbackLLM -> tries providers in order, e.g. OpenAI first and OpenRouter second
+
+Tuning via .env:
+LLM_TIMEOUT=60            # seconds per request
+LLM_MAX_RETRIES=4         # retries per provider
+LLM_RATE_LIMIT=5          # requests per second (token refill rate), 0 = no limit
+LLM_MAX_CONCURRENCY=4     # requests in flight at the same time
+"""
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_http_clients: dict[str, httpx.Client] = {}
+_http_clients_lock = threading.Lock()
+
+
+# One pooled http client per base url, shared by every LLM instance in the process
+def shared_http_client(base_url: str | None) -> httpx.Client:
+    key = base_url or "default"
+    with _http_clients_lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+                timeout=httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "60")), connect=10.0),
+            )
+            _http_clients[key] = client
+        return client
+
+
+"""
+Token bucket limiting the request rate plus a semaphore limiting requests in flight.
+
+A 429 from the provider calls pause(), so all callers back off together
+instead of every thread hammering the API with its own retries.
+A rate of 0 turns the rate limit off, concurrency and pauses still apply.
+"""
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: int | None = None, max_concurrency: int = 4):
+        if rate < 0:
+            raise ValueError(f"Rate limit must be 0 (no limit) or positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    # Block until a token is available
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and (self.rate == 0 or self.tokens >= 1):
+                    if self.rate:
+                        self.tokens -= 1
+                    return
+                wait = self.paused_until - now
+                if self.rate:
+                    wait = max(wait, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def __enter__(self):
+        self.slots.acquire()
+        try:
+            self.acquire()
+        except BaseException:
+            self.slots.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.slots.release()
+
+
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+# One limiter per provider, so the budget is shared by every chain in the process
+def shared_limiter(name: str) -> TokenBucket:
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(
+                rate=float(os.getenv("LLM_RATE_LIMIT", "5")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            )
+            _limiters[name] = limiter
+        return limiter
+
+
+# Seconds to wait according to a Retry-After header (delta seconds or http date)
+def retry_after_seconds(headers) -> float | None:
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRY_STATUS_CODES
+    return False
+
+
+# Base for LLMs used in a chain - prompt values are turned into text for get_response
+class ChainableLLM(ABC):
+
+    # make it chainable with chain op
+    def __call__(self, prompt) -> str:
+        try:
+            if not isinstance(prompt, str) and hasattr(prompt, "to_string"):
+                prompt_text = prompt.to_string()
+            else:
+                prompt_text = str(prompt)
+        except Exception:
+            prompt_text = str(prompt)
+        return self.get_response(prompt_text)
+
+    @abstractmethod
+    def get_response(self, prompt: str) -> str:
+        ...
+
+
+class ResilientLLM(ChainableLLM):
+
+    def __init__(self, name: str, api_key: str | None, model: str | None, base_url: str | None = None,
+                 max_retries: int | None = None, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.name = name
+        self.model = model
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "4"))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = shared_limiter(name)
+        # retries are handled here, so the SDK must not retry on its own
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            http_client=shared_http_client(base_url),
+        )
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            # small jitter so callers released by the same header do not fire at once
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def get_response(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.limiter:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[{"role": "user", "content": prompt}],
+                    )
+                return response.choices[0].message.content
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                retry_after = retry_after_seconds(getattr(getattr(e, "response", None), "headers", None))
+                rate_limited = isinstance(e, APIStatusError) and e.status_code == 429
+                if retry_after is not None and retry_after > self.max_delay:
+                    # retrying before Retry-After only gets another 429, FallbackLLM moves on to the next provider
+                    if rate_limited:
+                        self.limiter.pause(retry_after)
+                    print(f"{self.name}: Retry-After of {retry_after:.0f}s exceeds {self.max_delay:.0f}s, giving up")
+                    raise
+                delay = self._backoff(attempt, retry_after)
+                if rate_limited:
+                    self.limiter.pause(delay)
+                print(f"{self.name}: retry {attempt + 1}/{self.max_retries} in {delay:.1f}s ({e.__class__.__name__})")
+                time.sleep(delay)
+
+
+"""
+Try each provider in order and fall over to the next one when a provider
+is still failing after its own retries (or fails with a non-retryable API error).
+"""
+class FallbackLLM(ChainableLLM):
+
+    def __init__(self, providers: list):
+        if not providers:
+            raise RuntimeError("FallbackLLM needs at least one provider")
+        self.providers = providers
+
+    def get_response(self, prompt):
+        last_error = None
+        for provider in self.providers:
+            try:
+                return provider.get_response(prompt)
+            except (APIStatusError, APIConnectionError, APITimeoutError) as e:
+                print(f"{getattr(provider, 'name', provider.__class__.__name__)} failed, trying next provider: {e}")
+                last_error = e
+        raise last_error
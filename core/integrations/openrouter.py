@@ -1,28 +1,15 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import pathlib
+from .client import ResilientLLM
 
-class OpenRouter:
-    def __init__(self):
+class OpenRouter(ResilientLLM):
+    def __init__(self, **kwargs):
         load_dotenv()
-        self.client = OpenAI(api_key=os.getenv("OPENROUTER_API_KEY"), base_url=os.getenv("BASE_URL"))
-        self.model = os.getenv("MODEL")
-
-    def get_response(self, prompt):
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+        # OPENROUTER_MODEL lets OpenRouter act as fallback with a different model than OpenAI
+        super().__init__(
+            name="openrouter",
+            api_key=os.getenv("OPENROUTER_API_KEY"),
+            model=os.getenv("OPENROUTER_MODEL") or os.getenv("MODEL"),
+            base_url=os.getenv("BASE_URL") or "https://openrouter.ai/api/v1",
+            **kwargs,
         )
-        return response.choices[0].message.content
-
-    # make it chainable with chain op
-    def __call__(self, prompt) -> str:
-        try:
-            if not isinstance(prompt, str) and hasattr(prompt, "to_string"):
-                prompt_text = prompt.to_string()
-            else:
-                prompt_text = str(prompt)
-        except Exception:
-            prompt_text = str(prompt)
-        return self.get_response(prompt_text)
\ No newline at end of file
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import random
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+"""
+Bookkeeping for resumable ingestion.
+
+- IngestCheckpoint -> remembers per file which insert batches already made it into Weaviate
+- DeadLetterQueue -> jsonl file with objects that still failed after all retries
+- IngestReport -> summary of one load_documents run
+- with_retries -> exponential backoff with jitter for transient failures
+- rss_mb / peak_rss_mb / reset_peak_rss -> current and peak resident memory, for the memory high-water mark of a run
+
+State lives in DOKURAG_STATE_DIR (default: .dokurag) next to where the CLI is run.
+"""
+
+STATE_DIR = os.getenv("DOKURAG_STATE_DIR", ".dokurag")
+
+
+# Call fn and retry on the given exceptions with exponential backoff + full jitter
+def with_retries(fn, attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0,
+                 retry_on: tuple = (Exception,), on_retry=None):
+
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt == attempts:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
+
+
+# Peak resident set size in MB - kept by the kernel, so short spikes between samples are included
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2 ** 10
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB on Linux
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+# Current resident set size in MB (Linux), None where it cannot be read
+def current_rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Current resident set size in MB, falls back to the process peak where it cannot be read
+def rss_mb() -> float:
+    current = current_rss_mb()
+    return peak_rss_mb() if current is None else current
+
+
+# Set the kernel's peak (VmHWM) back to the current RSS (Linux), False where that is not possible
+def reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class IngestCheckpoint:
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(STATE_DIR, "checkpoint.json")
+        self.files: dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    # Files are identified by path + size + mtime, so a changed file is ingested again
+    @staticmethod
+    def fingerprint(file_path: str) -> dict:
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    def _entry(self, file_path: str) -> dict | None:
+        entry = self.files.get(os.path.abspath(file_path))
+        if entry is None:
+            return None
+        fp = self.fingerprint(file_path)
+        if entry.get("size") != fp["size"] or entry.get("mtime") != fp["mtime"]:
+            return None
+        return entry
+
+    def is_done(self, file_path: str) -> bool:
+        entry = self._entry(file_path)
+        return bool(entry and entry.get("done"))
+
+    # Number of insert batches of this file that are already stored
+    def batches_done(self, file_path: str) -> int:
+        entry = self._entry(file_path)
+        return entry.get("batches_done", 0) if entry else 0
+
+    def mark_batch(self, file_path: str, batch_index: int):
+        entry = self._entry(file_path) or {**self.fingerprint(file_path), "batches_done": 0, "done": False}
+        entry["batches_done"] = max(entry.get("batches_done", 0), batch_index + 1)
+        self.files[os.path.abspath(file_path)] = entry
+        self.save()
+
+    def mark_done(self, file_path: str):
+        entry = self._entry(file_path) or {**self.fingerprint(file_path), "batches_done": 0}
+        entry["done"] = True
+        self.files[os.path.abspath(file_path)] = entry
+        self.save()
+
+    def forget(self, file_path: str):
+        if self.files.pop(os.path.abspath(file_path), None) is not None:
+            self.save()
+
+    def reset(self):
+        self.files = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # Write to a temp file and rename so an interrupted write never corrupts the checkpoint
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class DeadLetterQueue:
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(STATE_DIR, "dead_letter.jsonl")
+        self.count = 0
+
+    def add(self, uuid: str, properties: dict, error: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        record = {
+            "uuid": uuid,
+            "properties": properties,
+            "error": error,
+            "time": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+
+# Label of the memory high-water mark in the report summary
+MEMORY_SCOPES = {"run": "", "sampled": ", sampled", "process": ", process-wide"}
+
+
+@dataclass
+class IngestReport:
+    processed_files: list[str] = field(default_factory=list)
+    skipped_files: list[str] = field(default_factory=list)
+    failed_files: dict[str, str] = field(default_factory=dict)
+    chunker: str | None = None
+    chunks_total: int = 0
+    tokens_total: int = 0
+    chunks_inserted: int = 0
+    retries: int = 0
+    failed_chunks: int = 0
+    ocr_failed_pages: int = 0
+    dead_letter_path: str | None = None
+    start_rss_mb: float = field(default_factory=rss_mb)
+    peak_rss_mb: float = 0.0
+    # run -> kernel peak reset at the start of the run, sampled -> RSS sampled by a thread,
+    # process -> only the peak of the whole process is known
+    memory_scope: str = "process"
+    _sampler: threading.Thread | None = field(default=None, repr=False, compare=False)
+    _stop_sampling: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+    """
+    Start measuring the memory of this run.
+
+    VmHWM and ru_maxrss keep the peak of the whole process, so a second run in the
+    same process (watch mode, the chain) would report the peak of an earlier one.
+    On Linux the kernel's peak is reset, elsewhere the RSS is sampled by a thread.
+    """
+    def start_memory_tracking(self, interval: float = 0.05):
+
+        self.start_rss_mb = rss_mb()
+        self.peak_rss_mb = self.start_rss_mb
+        if reset_peak_rss():
+            self.memory_scope = "run"
+            return
+        self.memory_scope = "sampled" if current_rss_mb() is not None else "process"
+        self._stop_sampling.clear()
+
+        def sample():
+            while not self._stop_sampling.wait(interval):
+                self.track_memory()
+
+        self._sampler = threading.Thread(target=sample, daemon=True)
+        self._sampler.start()
+
+    # Read after every insert window, with a reset kernel peak this includes the peak while a window was embedded
+    def track_memory(self):
+        self.peak_rss_mb = max(self.peak_rss_mb, peak_rss_mb() if self.memory_scope != "sampled" else rss_mb())
+
+    def stop_memory_tracking(self):
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        self.track_memory()
+
+    def summary(self) -> str:
+        lines = [
+            f"Processed files: {len(self.processed_files)}",
+            f"Skipped (already ingested): {len(self.skipped_files)}",
+            f"Chunks: {self.chunks_total} with {self.tokens_total} tokens ({self.chunker} chunker)",
+            f"Chunks inserted: {self.chunks_inserted}",
+            f"Retries: {self.retries}",
+            f"Failed chunks: {self.failed_chunks}",
+            f"Failed OCR pages: {self.ocr_failed_pages}",
+            f"Memory high-water mark: {max(self.peak_rss_mb, self.start_rss_mb):.0f} MB{MEMORY_SCOPES[self.memory_scope]} (started at {self.start_rss_mb:.0f} MB)",
+        ]
+        for file_path, error in self.failed_files.items():
+            lines.append(f"Failed file {file_path}: {error}")
+        if self.failed_chunks and self.dead_letter_path:
+            lines.append(f"Dead-letter file: {self.dead_letter_path}")
+        return "\n".join(lines)
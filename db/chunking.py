@@ -0,0 +1,238 @@
+import os
+import re
+import statistics
+from typing import NamedTuple
+import fitz
+import tiktoken
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+"""
+Chunkers for the ingestion pipeline. Both return Chunk tuples with character
+offsets into the page text and a token count.
+
+- RecursiveChunker -> the character splitter used so far (512 chars, 50 overlap)
+- LayoutChunker -> token-based, built on fitz text blocks and tables. Table rows and
+  sections are never cut in half and the table header is repeated when a table
+  continues in the next chunk. Produces fewer, denser chunks.
+
+Selected with CHUNKER=recursive|layout (default: recursive), CHUNK_TOKENS sets the
+token budget of the layout chunker.
+
+For the layout chunker the page text is the text of its units (blocks and table rows)
+joined by newlines, offsets refer to that text.
+"""
+
+TOKEN_ENCODING = os.getenv("CHUNK_ENCODING", "cl100k_base")
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+class Unit(NamedTuple):
+    text: str
+    kind: str                 # "text", "heading" or "row"
+    header: str | None = None  # header row of the table a row belongs to
+
+
+class TokenCounter:
+
+    def __init__(self, encoding: str = TOKEN_ENCODING):
+        self.encoding = tiktoken.get_encoding(encoding)
+
+    def __call__(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+class RecursiveChunker:
+
+    name = "recursive"
+
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50, counter: TokenCounter | None = None):
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+        self.count_tokens = counter or TokenCounter()
+
+    def split_text(self, text: str) -> list[Chunk]:
+        chunks = []
+        for doc in self.splitter.create_documents([text]):
+            start = max(doc.metadata.get("start_index", 0), 0)
+            chunks.append(Chunk(doc.page_content, start, start + len(doc.page_content), self.count_tokens(doc.page_content)))
+        return chunks
+
+    def split_page(self, page: fitz.Page) -> list[Chunk]:
+        return self.split_text(page.get_text().strip())
+
+
+class LayoutChunker:
+
+    name = "layout"
+
+    def __init__(self, max_tokens: int = 400, counter: TokenCounter | None = None):
+        self.max_tokens = max_tokens
+        self.count_tokens = counter or TokenCounter()
+
+    # Table rows as "cell | cell | cell", header only if the first row is completely filled
+    def _table_units(self, table) -> list[Unit]:
+        rows = []
+        for row in table.extract():
+            cells = [re.sub(r"\s+", " ", cell or "").strip() for cell in row]
+            if any(cells):
+                rows.append(cells)
+        if not rows:
+            return []
+
+        header = None
+        if table.header is not None and table.header.external:
+            header = " | ".join(re.sub(r"\s+", " ", name or "").strip() for name in table.header.names)
+        elif len(rows) > 1 and len(rows[0]) > 1 and all(rows[0]):
+            header = " | ".join(rows[0])
+
+        units = []
+        for cells in rows:
+            text = " | ".join(cell for cell in cells if cell)
+            units.append(Unit(text, "row", None if text == header else header))
+        return units
+
+    # Text blocks and table rows of a page in reading order
+    def _page_units(self, page: fitz.Page) -> list[Unit]:
+        try:
+            tables = page.find_tables().tables
+        except Exception:
+            tables = []
+        table_rects = [fitz.Rect(table.bbox) for table in tables]
+
+        items: list[tuple[float, float, list[Unit]]] = []
+        for table, rect in zip(tables, table_rects):
+            units = self._table_units(table)
+            if units:
+                items.append((rect.y0, rect.x0, units))
+
+        blocks = [block for block in page.get_text("dict", sort=True)["blocks"] if block.get("type") == 0]
+        sizes = [span["size"] for block in blocks for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+        body_size = statistics.median(sizes) if sizes else 0
+
+        for block in blocks:
+            rect = fitz.Rect(block["bbox"])
+            center = fitz.Point((rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2)
+            if any(table_rect.contains(center) for table_rect in table_rects):
+                continue
+            spans = [span for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+            lines = ["".join(span["text"] for span in line["spans"]).strip() for line in block["lines"]]
+            text = "\n".join(line for line in lines if line)
+            if not text:
+                continue
+            # short block in a larger or bold font starts a new section
+            larger = max(span["size"] for span in spans) >= body_size * 1.15
+            bold = all(span["flags"] & 16 for span in spans)
+            heading = len(lines) <= 2 and len(text) <= 120 and (larger or bold)
+            items.append((rect.y0, rect.x0, [Unit(text, "heading" if heading else "text")]))
+
+        items.sort(key=lambda item: (item[0], item[1]))
+        return [unit for _, _, units in items for unit in units]
+
+    # Split a unit that alone exceeds the token budget at word boundaries
+    def _split_oversized(self, text: str, start: int) -> list[Chunk]:
+        chunks = []
+        words = list(re.finditer(r"\S+", text))
+        piece_start = piece_end = None
+        tokens = 0
+        for word in words:
+            word_tokens = self.count_tokens(" " + word.group())
+            if piece_start is not None and tokens + word_tokens > self.max_tokens:
+                piece = text[piece_start:piece_end]
+                chunks.append(Chunk(piece, start + piece_start, start + piece_end, self.count_tokens(piece)))
+                piece_start, tokens = None, 0
+            if piece_start is None:
+                piece_start = word.start()
+            piece_end = word.end()
+            tokens += word_tokens
+        if piece_start is not None:
+            piece = text[piece_start:piece_end]
+            chunks.append(Chunk(piece, start + piece_start, start + piece_end, self.count_tokens(piece)))
+        return chunks
+
+    """
+    Greedily pack units into chunks of at most max_tokens.
+
+    Rows are never split, a heading never ends a chunk (it moves on with its section)
+    and a table that continues in a new chunk gets its header row repeated.
+    """
+    def _pack(self, units: list[tuple[Unit, int, int]]) -> list[Chunk]:
+        chunks: list[Chunk] = []
+        current: list[tuple[Unit, int, int, int]] = []
+        prefix = ""
+        tokens = 0
+
+        def flush():
+            nonlocal current, prefix, tokens
+            if current:
+                text = "\n".join(([prefix] if prefix else []) + [unit.text for unit, _, _, _ in current])
+                chunks.append(Chunk(text, current[0][1], current[-1][2], self.count_tokens(text)))
+            current, prefix, tokens = [], "", 0
+
+        for unit, start, end in units:
+            unit_tokens = self.count_tokens(unit.text)
+            if unit_tokens > self.max_tokens:
+                flush()
+                chunks.extend(self._split_oversized(unit.text, start))
+                continue
+            if current and tokens + unit_tokens > self.max_tokens:
+                carried = []
+                while current and current[-1][0].kind == "heading":
+                    carried.insert(0, current.pop())
+                flush()
+                current = carried
+                tokens = sum(item[3] for item in carried)
+            if not current and unit.kind == "row" and unit.header:
+                prefix = unit.header
+                tokens = self.count_tokens(prefix)
+                if tokens + unit_tokens > self.max_tokens:
+                    prefix, tokens = "", 0
+            current.append((unit, start, end, unit_tokens))
+            tokens += unit_tokens
+        flush()
+        return chunks
+
+    def split_page(self, page: fitz.Page) -> list[Chunk]:
+        units = []
+        offset = 0
+        for unit in self._page_units(page):
+            units.append((unit, offset, offset + len(unit.text)))
+            offset += len(unit.text) + 1
+        return self._pack(units)
+
+    # Plain text without layout (OCR output) - paragraphs are the units
+    def split_text(self, text: str) -> list[Chunk]:
+        units = []
+        for match in re.finditer(r"\S(?:.|\n(?!\s*\n))*", text):
+            paragraph = match.group().rstrip()
+            units.append((Unit(paragraph, "text"), match.start(), match.start() + len(paragraph)))
+        return self._pack(units)
+
+
+def make_chunker(name: str | None = None):
+    name = name or os.getenv("CHUNKER", "recursive")
+    if name == "recursive":
+        return RecursiveChunker()
+    if name == "layout":
+        return LayoutChunker(max_tokens=int(os.getenv("CHUNK_TOKENS", "400")))
+    raise ValueError(f"Unknown chunker '{name}'. Available: recursive, layout")
+
+
+# Chunk count and token totals of a corpus without embedding anything (pages with a text layer only)
+def corpus_stats(files: list[str], chunker) -> dict[str, int]:
+    stats = {"files": 0, "pages": 0, "chunks": 0, "tokens": 0}
+    for file_path in files:
+        with fitz.open(file_path) as doc:
+            stats["files"] += 1
+            for page in doc:
+                if not page.get_text().strip():
+                    continue
+                chunks = chunker.split_page(page)
+                stats["pages"] += 1
+                stats["chunks"] += len(chunks)
+                stats["tokens"] += sum(chunk.tokens for chunk in chunks)
+    return stats
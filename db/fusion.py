@@ -0,0 +1,52 @@
+"""
+Client-side rank fusion for the parallel BM25 / vector retrieval legs.
+
+Both functions take the two result lists as (id, score) pairs ordered best first
+and return ids ordered by fused score. alpha has the same meaning as in
+Weaviate hybrid search: 0 -> pure BM25, 1 -> pure vector.
+
+rank_fusion is the underlying reciprocal rank fusion for any number of lists,
+e.g. the results of several knowledge bases whose scores are not comparable.
+"""
+
+RRF_K = 60
+
+
+# Reciprocal rank fusion of result lists, all weighted equally unless weights are given
+def rank_fusion(result_lists: list[list[tuple[str, float]]], weights: list[float] | None = None,
+                k: int = RRF_K) -> list[tuple[str, float]]:
+
+    scores: dict[str, float] = {}
+    for weight, results in zip(weights or [1.0] * len(result_lists), result_lists):
+        for rank, (id_, _) in enumerate(results):
+            scores[id_] = scores.get(id_, 0.0) + weight / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+# Reciprocal rank fusion - only ranks matter, each leg weighted by alpha
+def reciprocal_rank_fusion(bm25: list[tuple[str, float]], vector: list[tuple[str, float]],
+                           alpha: float = 0.5, k: int = RRF_K) -> list[tuple[str, float]]:
+
+    return rank_fusion([bm25, vector], [1 - alpha, alpha], k=k)
+
+
+# Min-max normalise the scores of each leg and add them weighted by alpha (like Weaviate relativeScoreFusion)
+def weighted_fusion(bm25: list[tuple[str, float]], vector: list[tuple[str, float]],
+                    alpha: float = 0.5) -> list[tuple[str, float]]:
+
+    scores: dict[str, float] = {}
+    for weight, results in ((1 - alpha, bm25), (alpha, vector)):
+        if not results:
+            continue
+        values = [score for _, score in results]
+        low, high = min(values), max(values)
+        for id_, score in results:
+            normalised = (score - low) / (high - low) if high > low else 1.0
+            scores[id_] = scores.get(id_, 0.0) + weight * normalised
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+FUSION_METHODS = {
+    "rrf": reciprocal_rank_fusion,
+    "weighted": weighted_fusion,
+}
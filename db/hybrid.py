@@ -3,16 +3,66 @@ import io
 import re
 import hashlib
 import uuid
+import time
 from queue import Queue
+from itertools import batched
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import fitz
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import weaviate
 from weaviate.connect import ConnectionParams
 from weaviate.classes.init import AdditionalConfig, Timeout
-from weaviate.classes.config import Property, DataType, Configure
+from weaviate.classes.config import Property, DataType, Configure, Tokenization
+from weaviate.classes.query import Filter, Metrics, MetadataQuery
+from weaviate.classes.aggregate import GroupByAggregate
+from weaviate.classes.data import DataObject
+from weaviate.classes.tenants import Tenant, TenantActivityStatus
+from weaviate.exceptions import WeaviateBaseError
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from dotenv import load_dotenv
+from db.checkpoint import STATE_DIR, IngestCheckpoint, DeadLetterQueue, IngestReport, with_retries
+from db.fusion import FUSION_METHODS, rank_fusion
+from db.ocr import PageOcr
+from db.chunking import make_chunker
+from db.snapshot import export_snapshot, import_snapshot, read_manifest
+
+RETURN_PROPERTIES = ["text", "source", "page", "type", "chunk_index", "page_chunks", "start", "end"]
+
+# start / end -> character offsets of the chunk in its page text
+# chunk_index / page_chunks -> position of the chunk on its page and number of chunks of that page
+# source is field tokenized, so filters match the whole file name and not its words
+SCHEMA_PROPERTIES = [
+    Property(name="text", data_type=DataType.TEXT),
+    Property(name="source", data_type=DataType.TEXT, tokenization=Tokenization.FIELD),
+    Property(name="page", data_type=DataType.INT),
+    Property(name="type", data_type=DataType.TEXT),
+    Property(name="start", data_type=DataType.INT),
+    Property(name="end", data_type=DataType.INT),
+    Property(name="chunk_index", data_type=DataType.INT),
+    Property(name="page_chunks", data_type=DataType.INT),
+]
+
+
+# Object id derived from the chunk position, so neighbours and whole pages can be fetched by id
+def chunk_uuid(source: str, page: int, chunk_index: int) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{page}#{chunk_index}"))
+
+# Page size for fetching object ids
+FETCH_PAGE_SIZE = 1000
+
+# Knowledge base names become Weaviate tenant names and checkpoint file names
+def check_kb_name(name: str) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", name):
+        raise ValueError(f"Invalid knowledge base name '{name}': use up to 64 letters, digits, '_' or '-'")
+    return name
+
+# Failures worth retrying - everything else is a bug and should surface
+TRANSIENT_ERRORS = (WeaviateBaseError, TimeoutError, ConnectionError)
+
+
+class PartialBatchError(Exception):
+    """Some objects of an insert_many call were rejected."""
+
 
 """
 This class is a wrapper for Weaviate with hybrid (BM25 + vector) search.
@@ -21,6 +71,19 @@ Simple supported functions:
 - add_vectors
 - embed_documents
 - query_vectors -> Hybrid retrieval combining BM25 and vector similarity
+- query_fused -> BM25 and vector legs in parallel with client-side fusion and per-leg deadlines
+
+Admin functions (server-side, nothing is streamed to the client):
+- count -> total number of chunks via aggregate
+- source_stats -> chunk and page statistics per source file
+- delete_source -> delete_many by source filter
+- reset_collection -> drop and recreate the collection
+- export_snapshot / import_snapshot -> stream chunks with vectors to / from a .npz file
+
+Knowledge bases (tenants of the multi-tenant collection WEAVIATE_KB_COLLECTION):
+- create_kb / list_kbs / drop_kb -> manage knowledge bases
+- set_kb_status -> activate, deactivate or offload a knowledge base
+Pass tenants to HybridDB to ingest into / search in knowledge bases instead of the global collection.
 
 Simple flow of loading documents:
 
@@ -29,28 +92,25 @@ load documents -> check type -> chunk -> process chunks
 """
 class HybridDB:
 
-    def __init__(self, documents_folder: str | None = None):
-        self.setup(documents_folder)
+    def __init__(self, documents_folder: str | None = None, tenants: list[str] | None = None):
+        self.setup(documents_folder, tenants)
 
     # class vars setup
-    def setup(self, documents_folder: str | None = None):
+    # tenants -> knowledge bases to work on, None uses the single global collection
+    def setup(self, documents_folder: str | None = None, tenants: list[str] | None = None):
 
         load_dotenv()
 
         # Select embedding model (default: 768 dims)
-        embedding_model_name = os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3")
-
-        embedding_function = HuggingFaceEmbeddings(
-            model_name=embedding_model_name,
-            encode_kwargs={"normalize_embeddings": True},
-        )
+        self.embedding_model_name = os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3")
 
         # diff models need diff dirs to avoid dimension mismatch - BAAI -> 768 dims / allminilm -> 384 dims
-        safe_model_dir = re.sub(r"[^A-Za-z0-9._-]+", "_", embedding_model_name)
+        safe_model_dir = re.sub(r"[^A-Za-z0-9._-]+", "_", self.embedding_model_name)
         persist_directory = os.path.join("chroma_storage", safe_model_dir)
 
-        # Keep the embedder handy
-        self.embedder = embedding_function
+        # The embedder is loaded on first use - admin commands and snapshots never need it,
+        # query_fused loads it before its deadlines start
+        self._embedder = None
 
         # Weaviate setup
         conn = ConnectionParams.from_params(
@@ -68,43 +128,348 @@ class HybridDB:
             )
         )
         
-        self.collection_name = os.getenv("WEAVIATE_COLLECTION", "Dokurag_docs")
+        # Knowledge bases are tenants of one multi-tenant collection, so a query only
+        # searches the shards of the selected tenants and idle tenants can be offloaded
+        self.kb_collection_name = os.getenv("WEAVIATE_KB_COLLECTION", "Dokurag_kb")
+        self.tenants = [check_kb_name(tenant) for tenant in (tenants or []) if tenant]
+        if self.tenants:
+            self.collection_name = self.kb_collection_name
+            self.checkpoint_path = os.path.join(STATE_DIR, f"checkpoint_{self.tenants[0]}.json") if len(self.tenants) == 1 else None
+        else:
+            self.collection_name = os.getenv("WEAVIATE_COLLECTION", "Dokurag_docs")
+            self.checkpoint_path = None
+        # False for collections created before source was field tokenized, see _delete_source_chunks
+        self.exact_source = True
         self._ensure_collection()
 
-        self.splitter = RecursiveCharacterTextSplitter(chunk_size=512, chunk_overlap=50)
+        # Built on first use like the embedder - the token counter downloads its encoding the first time
+        self._chunker = None
+        self.ocr = PageOcr()
         self.documents_folder = documents_folder
 
+    @property
+    def embedder(self) -> HuggingFaceEmbeddings:
+        if self._embedder is None:
+            self._embedder = HuggingFaceEmbeddings(
+                model_name=self.embedding_model_name,
+                encode_kwargs={"normalize_embeddings": True},
+            )
+        return self._embedder
+
+    @property
+    def chunker(self):
+        if self._chunker is None:
+            self._chunker = make_chunker()
+        return self._chunker
+
     # Ensure collection exists with proper schema
-    def _ensure_collection(self):
+    def _ensure_collection(self, name: str | None = None, multi_tenant: bool | None = None):
 
+        name = name or self.collection_name
+        multi_tenant = bool(self.tenants) if multi_tenant is None else multi_tenant
         try:
             self.client.connect()
 
             # In weaviate-client v4, list_all returns a list of collection names (strings)
             existing = list(self.client.collections.list_all())
             print(existing)
-            if self.collection_name in existing:
+            if name in existing:
+                # collections created by older versions get the new properties added
+                collection = self.client.collections.get(name)
+                properties = {prop.name: prop for prop in collection.config.get().properties}
+                for prop in SCHEMA_PROPERTIES:
+                    if prop.name not in properties:
+                        collection.config.add_property(prop)
+                # tokenization of an existing property cannot be changed
+                source = properties.get("source")
+                if name == self.collection_name and source is not None and source.tokenization != Tokenization.FIELD:
+                    self.exact_source = False
+                    print(f"Collection {name} matches source by words, deleting a source is slower. "
+                          "Recreate it with -ex, -d and -im to match file names exactly.")
                 return
 
             self.client.collections.create(
-                name=self.collection_name,
+                name=name,
                 description="Dokurag document chunks",
                 vectorizer_config=Configure.Vectorizer.none(),
-                properties=[
-                    Property(name="text", data_type=DataType.TEXT),
-                    Property(name="source", data_type=DataType.TEXT),
-                    Property(name="page", data_type=DataType.INT),
-                    Property(name="type", data_type=DataType.TEXT),
-                ],
+                properties=SCHEMA_PROPERTIES,
+                multi_tenancy_config=Configure.multi_tenancy(
+                    enabled=True, auto_tenant_creation=True, auto_tenant_activation=True
+                ) if multi_tenant else None,
             )
-            print(f"Collection {self.collection_name} created successfully.")
+            print(f"Collection {name} created successfully.")
 
         except Exception as e:
             print(f"Error connecting to Weaviate: {e}")
             raise e
         finally:
             self.client.close()
-        
+
+    # Collection to write to - bound to the tenant when a knowledge base is selected
+    def _collection(self):
+
+        collection = self.client.collections.get(self.collection_name)
+        if not self.tenants:
+            return collection
+        if len(self.tenants) > 1:
+            raise ValueError(f"This operation works on a single knowledge base, got: {', '.join(self.tenants)}")
+        return collection.with_tenant(self.tenants[0])
+
+    # Collections to search - one per selected tenant
+    def _collections(self) -> list:
+
+        collection = self.client.collections.get(self.collection_name)
+        if not self.tenants:
+            return [collection]
+        return [collection.with_tenant(tenant) for tenant in self.tenants]
+
+    # Run a search on every selected tenant in parallel and keep the k best (obj, score) pairs
+    # Scores of different tenants are not comparable (hybrid scores are normalised per tenant),
+    # so several tenants are merged by rank with reciprocal rank fusion
+    def _search_all(self, search, k: int) -> list:
+
+        collections = self._collections()
+        if len(collections) == 1:
+            return search(collections[0])[:k]
+        with ThreadPoolExecutor(max_workers=len(collections)) as pool:
+            results = list(pool.map(search, collections))
+        objects = {str(obj.uuid): obj for items in results for obj, _ in items}
+        fused = rank_fusion([[(str(obj.uuid), score) for obj, score in items] for items in results])
+        return [(objects[id_], score) for id_, score in fused[:k]]
+
+    # Total number of chunks - aggregate runs server side, no objects are fetched
+    def count(self) -> int:
+
+        try:
+            self.client.connect()
+            return sum(collection.aggregate.over_all(total_count=True).total_count or 0
+                       for collection in self._collections())
+        finally:
+            self.client.close()
+
+    """
+    Chunk and page statistics per source file.
+
+    Returns a dict keyed by source with chunk count and first/last page.
+    Grouping is done by Weaviate, the client only receives one row per source.
+    """
+    def source_stats(self) -> dict[str, dict[str, int]]:
+
+        try:
+            self.client.connect()
+            collection = self._collection()
+            # without a limit Weaviate returns at most 100 groups, there are never more sources than chunks
+            total = collection.aggregate.over_all(total_count=True).total_count or 0
+            if total == 0:
+                return {}
+            result = collection.aggregate.over_all(
+                group_by=GroupByAggregate(prop="source", limit=total),
+                total_count=True,
+                return_metrics=Metrics("page").integer(minimum=True, maximum=True),
+            )
+            stats: dict[str, dict[str, int]] = {}
+            for group in result.groups:
+                page_metrics = group.properties.get("page")
+                stats[str(group.grouped_by.value)] = {
+                    "chunks": group.total_count or 0,
+                    "first_page": getattr(page_metrics, "minimum", None) or 0,
+                    "last_page": getattr(page_metrics, "maximum", None) or 0,
+                }
+            return dict(sorted(stats.items()))
+        finally:
+            self.client.close()
+
+    """
+    Delete all chunks of one source file with delete_many.
+
+    Weaviate caps a single delete_many at QUERY_MAXIMUM_RESULTS matches,
+    so we repeat until nothing matches anymore. Returns the number of deleted chunks.
+    """
+    def delete_source(self, source: str) -> int:
+
+        try:
+            self.client.connect()
+            deleted = self._delete_source_chunks(self._collection(), source)
+        finally:
+            self.client.close()
+
+        # The file has to be ingested again if it shows up later
+        checkpoint = IngestCheckpoint(self.checkpoint_path)
+        for file_path in list(checkpoint.files):
+            if os.path.basename(file_path) == os.path.basename(source):
+                checkpoint.files.pop(file_path)
+        checkpoint.save()
+        return deleted
+
+    # delete_many on an open connection, used by delete_source and load_documents
+    def _delete_source_chunks(self, collection, source: str) -> int:
+
+        source = os.path.basename(source)
+        where = Filter.by_property("source").equal(source)
+        filters = [where]
+        if not self.exact_source:
+            # a word tokenized source also matches other files with the same words
+            # ("ZMP_1006715 (1).pdf"), so the exact matches are deleted by id
+            ids, offset = [], 0
+            while True:
+                result = collection.query.fetch_objects(
+                    filters=where, limit=FETCH_PAGE_SIZE, offset=offset, return_properties=["source"],
+                )
+                ids.extend(obj.uuid for obj in result.objects if obj.properties.get("source") == source)
+                if len(result.objects) < FETCH_PAGE_SIZE:
+                    break
+                offset += FETCH_PAGE_SIZE
+            filters = [Filter.by_id().contains_any(list(part)) for part in batched(ids, FETCH_PAGE_SIZE)]
+
+        deleted = 0
+        for where in filters:
+            while True:
+                result = collection.data.delete_many(where=where)
+                deleted += result.successful
+                if result.failed:
+                    raise RuntimeError(f"Failed to delete {result.failed} chunks of {source}")
+                if result.matches == 0 or result.successful == 0:
+                    break
+        return deleted
+
+    # Drop the whole collection and create an empty one with the same schema
+    # With a knowledge base selected only that tenant is emptied
+    def reset_collection(self):
+
+        if self.tenants:
+            self._collection()  # single knowledge base check
+            self.drop_kb(self.tenants[0])
+            self.create_kb(self.tenants[0])
+            return
+
+        try:
+            self.client.connect()
+            if self.client.collections.exists(self.collection_name):
+                self.client.collections.delete(self.collection_name)
+        finally:
+            self.client.close()
+
+        IngestCheckpoint(self.checkpoint_path).reset()
+        self._ensure_collection()
+
+    # Knowledge base (tenant) management - works independent of the selected tenants
+
+    def _kb_tenants(self):
+
+        self._ensure_collection(self.kb_collection_name, multi_tenant=True)
+        self.client.connect()
+        return self.client.collections.get(self.kb_collection_name).tenants
+
+    def create_kb(self, name: str):
+
+        check_kb_name(name)
+        try:
+            tenants = self._kb_tenants()
+            if not tenants.exists(name):
+                tenants.create([Tenant(name=name)])
+        finally:
+            self.client.close()
+
+    # name -> activity status and chunk count (counted for active knowledge bases only)
+    def list_kbs(self) -> dict[str, dict]:
+
+        try:
+            tenants = self._kb_tenants()
+            collection = self.client.collections.get(self.kb_collection_name)
+            kbs = {}
+            for name, tenant in sorted(tenants.get().items()):
+                status = tenant.activity_status
+                chunks = None
+                if status == TenantActivityStatus.ACTIVE:
+                    chunks = collection.with_tenant(name).aggregate.over_all(total_count=True).total_count
+                kbs[name] = {"status": status.value.lower(), "chunks": chunks}
+            return kbs
+        finally:
+            self.client.close()
+
+    def drop_kb(self, name: str):
+
+        check_kb_name(name)
+        try:
+            tenants = self._kb_tenants()
+            if tenants.exists(name):
+                tenants.remove([name])
+        finally:
+            self.client.close()
+        IngestCheckpoint(os.path.join(STATE_DIR, f"checkpoint_{name}.json")).reset()
+
+    """
+    Change the activity status of a knowledge base.
+
+    active -> loaded and searchable
+    inactive -> unloaded from memory, stays on local disk
+    offloaded -> moved to cloud storage (needs the offload-s3 module in Weaviate)
+    Inactive knowledge bases are activated again automatically when they are used.
+    """
+    def set_kb_status(self, name: str, status: str):
+
+        check_kb_name(name)
+        try:
+            tenants = self._kb_tenants()
+            if not tenants.exists(name):
+                raise ValueError(f"Knowledge base '{name}' does not exist")
+            if status == "active":
+                tenants.activate(name)
+            elif status == "inactive":
+                tenants.deactivate(name)
+            elif status == "offloaded":
+                tenants.offload(name)
+            else:
+                raise ValueError(f"Unknown status '{status}'. Available: active, inactive, offloaded")
+        finally:
+            self.client.close()
+
+    # Turn a Weaviate result object into a langchain Document
+    def _to_document(self, obj) -> Document:
+
+        props = obj.properties or {}
+        page_content = props.get("text", "")
+        metadata = {
+            "source": props.get("source"),
+            "page": props.get("page"),
+            "type": props.get("type"),
+            "chunk_index": props.get("chunk_index"),
+            "page_chunks": props.get("page_chunks"),
+            "start": props.get("start"),
+            "end": props.get("end"),
+        }
+        return Document(page_content=page_content, metadata=metadata)
+
+    # Stream every chunk with its vector into a .npz snapshot - returns the number of exported objects
+    def export_snapshot(self, path: str, shard_size: int = 1000) -> int:
+
+        try:
+            self.client.connect()
+            collection = self._collection()
+            manifest = {"collection": self.collection_name, "tenant": collection.tenant, "embedding_model": self.embedding_model_name}
+            return export_snapshot(collection, path, manifest, shard_size=shard_size)
+        finally:
+            self.client.close()
+
+    """
+    Bulk-load a snapshot with the batch API, using the stored vectors (nothing is embedded).
+
+    The snapshot must come from the same embedding model, otherwise its vectors
+    would not be comparable to new queries. Returns (imported, failed).
+    """
+    def import_snapshot(self, path: str, batch_size: int = 200) -> tuple[int, int]:
+
+        manifest = read_manifest(path)
+        if manifest.get("embedding_model") != self.embedding_model_name:
+            raise ValueError(
+                f"Snapshot was created with {manifest.get('embedding_model')}, "
+                f"but EMBEDDING_MODEL is {self.embedding_model_name}"
+            )
+        try:
+            self.client.connect()
+            return import_snapshot(self._collection(), path, batch_size=batch_size)
+        finally:
+            self.client.close()
 
     # Hybrid search over BM25 + vector
     def query_vectors(self, query: str, k: int = 40, alpha: float = 0.5):
@@ -112,33 +477,210 @@ class HybridDB:
         try:
             self.client.connect()
 
-            collection = self.client.collections.get(self.collection_name)
             query_vector = self.embedder.embed_query(query)
-            result = collection.query.hybrid(
+
+            def search(collection):
+                result = collection.query.hybrid(
+                    query=query,
+                    vector=query_vector,
+                    alpha=alpha,
+                    limit=k,
+                    return_properties=RETURN_PROPERTIES,
+                    return_metadata=MetadataQuery(score=True),
+                )
+                return [(obj, obj.metadata.score or 0.0) for obj in result.objects]
+
+            return [self._to_document(obj) for obj, _ in self._search_all(search, k)]
+
+        except Exception as e:
+            print(f"Error querying Weaviate: {e}")
+            raise e
+        finally:
+            self.client.close()
+
+    """
+    Hybrid search with the two legs run in parallel and fused on the client.
+
+    The BM25 leg starts right away while the query is still being embedded,
+    the vector leg runs as soon as the embedding is ready.
+    Each leg has its own deadline (seconds from the start of the call). A leg that
+    misses it or fails is dropped and the other leg's results are returned.
+
+    fusion: "rrf" -> reciprocal rank fusion, "weighted" -> min-max normalised scores weighted by alpha
+    """
+    def query_fused(self, query: str, k: int = 40, alpha: float = 0.5, fusion: str = "rrf",
+                    bm25_timeout: float = 3.0, vector_timeout: float = 10.0):
+
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method '{fusion}'. Available: {', '.join(FUSION_METHODS)}")
+
+        # load the embedding model up front, the vector leg's deadline is meant for the query only
+        embedder = self.embedder
+
+        def bm25_search(collection):
+            result = collection.query.bm25(
                 query=query,
-                vector=query_vector,
-                alpha=alpha,
                 limit=k,
-                return_properties=["text", "source", "page", "type"],
+                return_properties=RETURN_PROPERTIES,
+                return_metadata=MetadataQuery(score=True),
             )
-            documents: list[Document] = []
-            for obj in result.objects:
-                props = obj.properties or {}
-                page_content = props.get("text", "")
-                metadata = {
-                    "source": props.get("source"),
-                    "page": props.get("page"),
-                    "type": props.get("type"),
-                }
-                documents.append(Document(page_content=page_content, metadata=metadata))
-            return documents
+            return [(obj, obj.metadata.score or 0.0) for obj in result.objects]
+
+        def bm25_leg():
+            return self._search_all(bm25_search, k)
+
+        def vector_leg():
+            query_vector = embedder.embed_query(query)
+
+            def search(collection):
+                result = collection.query.near_vector(
+                    near_vector=query_vector,
+                    limit=k,
+                    return_properties=RETURN_PROPERTIES,
+                    return_metadata=MetadataQuery(distance=True),
+                )
+                # cosine distance -> similarity so that higher is better in both legs
+                return [(obj, 1.0 - (obj.metadata.distance or 0.0)) for obj in result.objects]
+
+            return self._search_all(search, k)
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            self.client.connect()
+
+            started = time.monotonic()
+            legs = {
+                "bm25": (executor.submit(bm25_leg), bm25_timeout),
+                "vector": (executor.submit(vector_leg), vector_timeout),
+            }
+            results: dict[str, list] = {}
+            for name, (future, timeout) in legs.items():
+                try:
+                    results[name] = future.result(timeout=max(0.0, started + timeout - time.monotonic()))
+                except FutureTimeoutError:
+                    print(f"{name} leg missed its {timeout}s deadline, using the other leg only")
+                except Exception as e:
+                    print(f"{name} leg failed, using the other leg only: {e}")
+
+            if not results:
+                raise RuntimeError("Both BM25 and vector legs failed or timed out")
+
+            objects = {}
+            for leg in results.values():
+                for obj, _ in leg:
+                    objects[str(obj.uuid)] = obj
+            fused = FUSION_METHODS[fusion](
+                [(str(obj.uuid), score) for obj, score in results.get("bm25", [])],
+                [(str(obj.uuid), score) for obj, score in results.get("vector", [])],
+                alpha=alpha,
+            )
+            return [self._to_document(objects[id_]) for id_, _ in fused[:k]]
 
         except Exception as e:
             print(f"Error querying Weaviate: {e}")
             raise e
         finally:
+            # a leg that missed its deadline is not waited for
+            executor.shutdown(wait=False, cancel_futures=True)
             self.client.close()
     
+    # Merge the chunks of one page that follow each other, overlapping text is only kept once
+    # Merged documents span chunk_index .. last_chunk_index
+    @staticmethod
+    def _merge_adjacent(docs: list[Document]) -> list[Document]:
+
+        merged: list[Document] = []
+        for doc in sorted(docs, key=lambda d: d.metadata["chunk_index"]):
+            last = merged[-1] if merged else None
+            if last is not None and doc.metadata["chunk_index"] == last.metadata["last_chunk_index"] + 1:
+                text = doc.page_content
+                overlap = (last.metadata.get("end") or 0) - (doc.metadata.get("start") or 0)
+                if last.metadata.get("end") is not None and doc.metadata.get("start") is not None and 0 < overlap < len(text):
+                    text = text[overlap:]
+                else:
+                    text = "\n" + text
+                last.page_content += text
+                last.metadata["last_chunk_index"] = doc.metadata["chunk_index"]
+                last.metadata["end"] = doc.metadata.get("end")
+            else:
+                merged.append(Document(
+                    page_content=doc.page_content,
+                    metadata={**doc.metadata, "last_chunk_index": doc.metadata["chunk_index"]},
+                ))
+        return merged
+
+    """
+    Small-to-big retrieval: search a small top-k, then fetch more context only for the winners.
+
+    expand="neighbours" -> the `window` chunks before and after each hit on the same page
+    expand="page" -> every chunk of the hit's page
+
+    Context chunks are fetched by id (ids are derived from the chunk position) and adjacent
+    chunks are merged, so the result is one Document per contiguous span, ordered by the
+    rank of its best hit. Hits stored before positions were recorded are returned as they are.
+    """
+    def query_small_to_big(self, query: str, k: int = 8, alpha: float = 0.5, window: int = 1,
+                           expand: str = "neighbours"):
+
+        if expand not in ("neighbours", "page"):
+            raise ValueError(f"Unknown expand mode '{expand}'. Available: neighbours, page")
+
+        hits = self.query_vectors(query, k=k, alpha=alpha)
+
+        # (source, page) -> chunk indexes to fetch, in rank order of the pages
+        wanted: dict[tuple[str, int], set[int]] = {}
+        for hit in hits:
+            meta = hit.metadata
+            if meta.get("chunk_index") is None or meta.get("page_chunks") is None:
+                continue
+            if expand == "page":
+                indexes = range(meta["page_chunks"])
+            else:
+                indexes = range(max(0, meta["chunk_index"] - window), min(meta["page_chunks"], meta["chunk_index"] + window + 1))
+            wanted.setdefault((meta["source"], meta["page"]), set()).update(indexes)
+
+        ids = [chunk_uuid(source, page, i) for (source, page), indexes in wanted.items() for i in indexes]
+        fetched: dict[tuple[str, int], list[Document]] = {}
+        if ids:
+            try:
+                self.client.connect()
+                seen = set()
+                for collection in self._collections():
+                    result = collection.query.fetch_objects(
+                        filters=Filter.by_id().contains_any(ids),
+                        limit=len(ids),
+                        return_properties=RETURN_PROPERTIES,
+                    )
+                    for obj in result.objects:
+                        # the same file stored in several knowledge bases has the same chunk ids
+                        if obj.uuid in seen:
+                            continue
+                        seen.add(obj.uuid)
+                        doc = self._to_document(obj)
+                        fetched.setdefault((doc.metadata["source"], doc.metadata["page"]), []).append(doc)
+            finally:
+                self.client.close()
+
+        spans = {page_key: self._merge_adjacent(docs) for page_key, docs in fetched.items()}
+        documents: list[Document] = []
+        seen: set[int] = set()
+        for hit in hits:
+            meta = hit.metadata
+            page_spans = spans.get((meta.get("source"), meta.get("page")))
+            if meta.get("chunk_index") is None or not page_spans:
+                documents.append(hit)
+                continue
+            # the merged span that contains this hit, each span is returned once
+            for span in page_spans:
+                if span.metadata["chunk_index"] <= meta["chunk_index"] <= span.metadata["last_chunk_index"]:
+                    if id(span) not in seen:
+                        seen.add(id(span))
+                        documents.append(span)
+                    break
+            else:
+                documents.append(hit)
+        return documents
+
     # Hash chunk to use as id - helper function for removing duplicates
     def hash_chunk(self, chunk: str):
         return hashlib.sha256(chunk.encode()).hexdigest()
@@ -155,13 +697,137 @@ class HybridDB:
 
         return all_files
 
+    # One Document per chunk of a page
+    def _page_documents(self, file_path: str, page_index: int, chunks: list, text_type: str):
+
+        for chunk_index, chunk in enumerate(chunks):
+            yield Document(
+                page_content=chunk.text,
+                metadata={
+                    "source": os.path.basename(file_path),
+                    "page": page_index + 1,
+                    "type": text_type,
+                    "chunk_index": chunk_index,
+                    "page_chunks": len(chunks),
+                    "start": chunk.start,
+                    "end": chunk.end,
+                    "tokens": chunk.tokens,
+                }
+            )
+
+    """
+    Stream the chunks of an open document page by page.
+
+    Pages with a text layer are chunked as they are read, pages without one are
+    OCR'd after the last page (type "ocr"). Only the current page is held in memory.
+    Pages whose OCR failed are appended to ocr_failed.
+    """
+    def _iter_chunks(self, doc: fitz.Document, file_path: str, ocr_failed: list[int] | None = None):
+
+        scanned: list[int] = []
+        for page_index, page in enumerate(doc):
+            if page.get_text().strip():
+                yield from self._page_documents(file_path, page_index, self.chunker.split_page(page), "text")
+            else:
+                scanned.append(page_index)
+
+        for page_index, text in self.ocr.recognise(doc, file_path, scanned, ocr_failed):
+            yield from self._page_documents(file_path, page_index, self.chunker.split_text(text), "ocr")
+
+    """
+    Embed and insert one batch of chunks.
+
+    Transient failures (timeouts, connection drops, per-object batch errors) are retried
+    with exponential backoff. Only the objects that failed are sent again.
+    Whatever still fails after the last attempt goes to the dead-letter file.
+    Returns the number of chunks that failed.
+    """
+    def _insert_batch(self, collection, docs: list[Document], dead_letter: DeadLetterQueue,
+                      report: IngestReport, attempts: int = 5) -> int:
+
+        ids = [chunk_uuid(doc.metadata["source"], doc.metadata["page"], doc.metadata["chunk_index"]) for doc in docs]
+        properties = [
+            {
+                "text": doc.page_content,
+                "source": doc.metadata.get("source"),
+                "page": doc.metadata.get("page"),
+                "type": doc.metadata.get("type"),
+                "chunk_index": doc.metadata.get("chunk_index"),
+                "page_chunks": doc.metadata.get("page_chunks"),
+                "start": doc.metadata.get("start"),
+                "end": doc.metadata.get("end"),
+            }
+            for doc in docs
+        ]
+
+        def count_retry(attempt, error, delay):
+            report.retries += 1
+            print(f"Retry {attempt}/{attempts - 1} in {delay:.1f}s: {error}")
+
+        try:
+            vectors = with_retries(
+                lambda: self.embedder.embed_documents([doc.page_content for doc in docs]),
+                attempts=3,
+                on_retry=count_retry,
+            )
+        except Exception as e:
+            for id_, props in zip(ids, properties):
+                dead_letter.add(id_, props, f"embedding failed: {e}")
+            report.failed_chunks += len(docs)
+            return len(docs)
+
+        objects = [
+            DataObject(properties=props, vector=vector, uuid=id_)
+            for id_, props, vector in zip(ids, properties, vectors)
+        ]
+        pending = list(range(len(objects)))
+        errors: dict[int, str] = {}
+
+        def insert_pending():
+            nonlocal pending
+            if not self.client.is_connected():
+                self.client.connect()
+            try:
+                result = collection.data.insert_many([objects[i] for i in pending])
+            except TRANSIENT_ERRORS as e:
+                errors.update({i: str(e) for i in pending})
+                raise
+            failed = {pending[j]: err.message for j, err in result.errors.items()}
+            report.chunks_inserted += len(pending) - len(failed)
+            errors.update(failed)
+            pending = list(failed)
+            if pending:
+                raise PartialBatchError(f"{len(pending)} of {len(objects)} objects failed")
+
+        try:
+            with_retries(insert_pending, attempts=attempts,
+                         retry_on=TRANSIENT_ERRORS + (PartialBatchError,), on_retry=count_retry)
+        except TRANSIENT_ERRORS + (PartialBatchError,):
+            for i in pending:
+                dead_letter.add(ids[i], properties[i], errors.get(i, "unknown error"))
+            report.failed_chunks += len(pending)
+            return len(pending)
+        return 0
+
     """
     This function loads docs to db
 
+    Progress is checkpointed per file and per insert batch, so an interrupted run
+    continues where it stopped. Files that did not change since they were stored are skipped.
+    A file that is stored from its first batch on replaces all chunks of its previous version.
+    The checkpoint stops at the first batch with failed chunks or after a page whose OCR
+    failed, so the next run retries the file from that batch on.
+
+    Files are streamed page by page and flushed in windows of insert_batch_size chunks,
+    so peak memory does not depend on file size. The report includes the memory high-water mark of the run.
+
     batch_size: int = 10 -> batch size for uploading documents
     uploaded_documents: list[Document] -> use documents provided
+    insert_batch_size: int = 64 -> chunks embedded and inserted per request
+    resume: bool = True -> skip work recorded in the checkpoint, False starts from scratch
     """
-    def load_documents(self, batch_size: int = 10, uploaded_documents: list[str] | None = None):
+    def load_documents(self, batch_size: int = 10, uploaded_documents: list[str] | None = None,
+                       insert_batch_size: int = 64, resume: bool = True) -> IngestReport | None:
         all_files = (
             uploaded_documents
             if uploaded_documents is not None and len(uploaded_documents) > 0
@@ -172,48 +838,90 @@ class HybridDB:
             print("No PDF files found to process.")
             return
 
-        for batch_start in range(0, len(all_files), batch_size):
-            batch_files = all_files[batch_start:batch_start + batch_size]
-            docs_to_add = []
-            doc_ids = []
-
-            for file_path in batch_files:
-                doc = fitz.open(file_path)
-
-                for page_index, page in enumerate(doc):
-                    # extract and chunk text
-                    text = page.get_text().strip()
-                    if text:
-                        text_chunks = self.splitter.split_text(text)
-                        for chunk in text_chunks:
-                            docs_to_add.append(Document(
-                                page_content=chunk,
-                                metadata={"source": os.path.basename(file_path), "page": page_index + 1, "type": "text"}
-                            ))
-                            doc_ids.append(str(uuid.uuid5(uuid.NAMESPACE_URL, chunk)))
-                    
-            try:
-                self.client.connect()
-                collection = self.client.collections.get(self.collection_name)
-                for doc, id_ in zip(docs_to_add, doc_ids):
-                    try:
-                        vector = self.embedder.embed_query(doc.page_content)
-                        collection.data.insert(
-                            properties={
-                                "text": doc.page_content,
-                                "source": doc.metadata.get("source"),
-                                "page": doc.metadata.get("page"),
-                                "type": doc.metadata.get("type"),
-                            },
-                            vector=vector,
-                            uuid=id_,
-                        )
-                    except Exception as e:
-                        if "already exists" in str(e) or "duplicate" in str(e):
+        checkpoint = IngestCheckpoint(self.checkpoint_path)
+        if not resume:
+            checkpoint.reset()
+        dead_letter = DeadLetterQueue()
+        report = IngestReport(dead_letter_path=dead_letter.path, chunker=self.chunker.name)
+        report.start_memory_tracking()
+
+        def count_retry(attempt, error, delay):
+            report.retries += 1
+            print(f"Retry {attempt} in {delay:.1f}s: {error}")
+
+        try:
+            for batch_start in range(0, len(all_files), batch_size):
+                batch_files = all_files[batch_start:batch_start + batch_size]
+                inserted_before = report.chunks_inserted
+
+                try:
+                    self.client.connect()
+                    collection = self._collection()
+
+                    for file_path in batch_files:
+                        if checkpoint.is_done(file_path):
+                            report.skipped_files.append(file_path)
                             continue
-                        else:
-                            raise e
-            finally:
-                self.client.close()
 
-            print(f"✅ Uploaded {len(batch_files)} documents with {len(docs_to_add)} chunks.")
\ No newline at end of file
+                        try:
+                            doc = fitz.open(file_path)
+                        except Exception as e:
+                            print(f"Error reading {file_path}: {e}")
+                            report.failed_files[file_path] = str(e)
+                            continue
+
+                        # page -> chunk -> (id, vector) in fixed-size windows, earlier windows are skipped on resume
+                        done = checkpoint.batches_done(file_path)
+                        if done == 0:
+                            # ids are positional, so a new version of the file would only overwrite the
+                            # chunks at the same positions and leave the rest of the old version behind
+                            def delete_previous():
+                                if not self.client.is_connected():
+                                    self.client.connect()
+                                return self._delete_source_chunks(collection, file_path)
+
+                            try:
+                                deleted = with_retries(delete_previous, retry_on=TRANSIENT_ERRORS, on_retry=count_retry)
+                            except Exception as e:
+                                print(f"Error deleting the previous version of {file_path}: {e}")
+                                report.failed_files[file_path] = f"deleting the previous version failed, retried on the next run: {e}"
+                                doc.close()
+                                continue
+                            if deleted:
+                                print(f"Deleted {deleted} chunks of the previous version of {os.path.basename(file_path)}")
+                        failed = 0
+                        ocr_failed: list[int] = []
+                        with doc:
+                            for batch_index, window in enumerate(batched(self._iter_chunks(doc, file_path, ocr_failed), insert_batch_size)):
+                                report.chunks_total += len(window)
+                                report.tokens_total += sum(chunk.metadata.get("tokens", 0) for chunk in window)
+                                if batch_index >= done:
+                                    failed += self._insert_batch(collection, list(window), dead_letter, report)
+                                    # later batches are still inserted, but only count as done up to the first failure
+                                    # a skipped OCR page shifts the chunks of the later windows
+                                    if not failed and not ocr_failed:
+                                        checkpoint.mark_batch(file_path, batch_index)
+                                # drop MuPDF's cached page resources
+                                fitz.TOOLS.store_shrink(100)
+                                report.track_memory()
+
+                        if ocr_failed:
+                            report.ocr_failed_pages += len(ocr_failed)
+                            pages = ", ".join(str(page_index + 1) for page_index in ocr_failed)
+                            report.failed_files[file_path] = f"OCR failed for pages {pages}, retried on the next run"
+                            continue
+                        if failed:
+                            report.failed_files[file_path] = f"{failed} chunks failed, retried on the next run"
+                            continue
+                        checkpoint.mark_done(file_path)
+                        report.processed_files.append(file_path)
+                finally:
+                    self.client.close()
+
+                print(f"✅ Uploaded {len(batch_files)} documents with {report.chunks_inserted - inserted_before} chunks.")
+        finally:
+            self.ocr.close()
+            report.stop_memory_tracking()
+
+        print(report.summary())
+        return report
@@ -0,0 +1,145 @@
+import os
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+from db.checkpoint import STATE_DIR
+
+"""
+OCR for pages without a text layer (scanned datasheets).
+
+Pages are rendered with fitz and recognised with Tesseract through fitz's own OCR
+support, so only the tesseract binary and its language data are needed.
+Recognition runs in a process pool and results are cached on disk by a hash of
+the page content, so re-ingesting a file never OCRs the same page twice.
+
+Settings via .env:
+OCR_ENABLED=true          # set to false to skip scanned pages like before
+OCR_LANGUAGE=deu+eng      # tesseract language(s)
+OCR_DPI=300               # render resolution
+OCR_WORKERS=4             # processes, defaults to the number of cpus
+"""
+
+
+def ocr_available() -> bool:
+    try:
+        return bool(fitz.get_tessdata())
+    except Exception:
+        return False
+
+
+# Hash of everything that ends up on the rendered page: content streams and raw image data
+def page_hash(doc: fitz.Document, page: fitz.Page, dpi: int, language: str) -> str:
+    digest = hashlib.sha256(f"{dpi}:{language}".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+# Worker function - runs in a separate process, so it opens the file itself
+def ocr_page(file_path: str, page_index: int, dpi: int, language: str) -> str:
+    with fitz.open(file_path) as doc:
+        pix = doc[page_index].get_pixmap(dpi=dpi)
+        with fitz.open("pdf", pix.pdfocr_tobytes(language=language)) as ocr_doc:
+            return "\n".join(page.get_text() for page in ocr_doc).strip()
+
+
+class OcrCache:
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or os.path.join(STATE_DIR, "ocr_cache")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, key: str, text: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+class PageOcr:
+
+    def __init__(self):
+        self.enabled = os.getenv("OCR_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.language = os.getenv("OCR_LANGUAGE", "deu+eng")
+        self.dpi = int(os.getenv("OCR_DPI", "300"))
+        self.workers = int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+        self.cache = OcrCache()
+        self.pool: ProcessPoolExecutor | None = None
+        self.warned = False
+
+    def _available(self) -> bool:
+        if not self.enabled:
+            return False
+        if ocr_available():
+            return True
+        if not self.warned:
+            print("Tesseract not found (set TESSDATA_PREFIX), pages without text layer are skipped.")
+            self.warned = True
+        return False
+
+    """
+    OCR the given pages of an open document, yielding (page_index, text) in page order.
+
+    Only pages with images are considered. Cached pages are read from disk,
+    the rest is sent to the process pool with at most two pages per worker in
+    flight, so memory does not grow with the number of scanned pages.
+    Pages whose OCR failed are skipped and appended to `failed`.
+    """
+    def recognise(self, doc: fitz.Document, file_path: str, page_indexes: list[int], failed: list[int] | None = None):
+
+        if not page_indexes or not self._available():
+            return
+
+        in_flight: deque = deque()
+
+        def drain(limit: int):
+            while len(in_flight) > limit:
+                page_index, key, cached, future = in_flight.popleft()
+                text = cached
+                if future is not None:
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        print(f"OCR failed for {os.path.basename(file_path)} page {page_index + 1}: {e}")
+                        if failed is not None:
+                            failed.append(page_index)
+                        continue
+                    self.cache.put(key, text)
+                if text:
+                    yield page_index, text
+
+        for page_index in page_indexes:
+            page = doc[page_index]
+            if not page.get_images():
+                continue
+            key = page_hash(doc, page, self.dpi, self.language)
+            cached = self.cache.get(key)
+            future = None
+            if cached is None:
+                if self.pool is None:
+                    # the ingesting process runs threads (gRPC, torch), forking it can deadlock
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                future = self.pool.submit(ocr_page, file_path, page_index, self.dpi, self.language)
+            in_flight.append((page_index, key, cached, future))
+            yield from drain(self.workers * 2)
+
+        yield from drain(0)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
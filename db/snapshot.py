@@ -0,0 +1,127 @@
+import io
+import json
+import uuid
+import zipfile
+import numpy as np
+
+"""
+Snapshot export / import of a collection including vectors.
+
+A snapshot is a regular .npz file (readable with numpy.load) written shard by shard,
+so neither direction ever holds more than one shard in memory:
+
+- vectors_000000.npy -> float32 (n, dim)
+- uuids_000000.npy -> uint8 (n, 16), raw uuid bytes
+- properties_000000.npy -> uint8, utf-8 json lines with the object properties
+- manifest.npy -> uint8, utf-8 json: collection, embedding model, dimensions, object count, shards
+
+Import uses the batch API with the stored vectors, nothing is embedded.
+"""
+
+
+def _bytes_array(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def _write_array(archive: zipfile.ZipFile, name: str, array: np.ndarray):
+    with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+        np.lib.format.write_array(f, array, allow_pickle=False)
+
+
+def _read_array(archive: zipfile.ZipFile, name: str) -> np.ndarray:
+    with archive.open(f"{name}.npy") as f:
+        return np.lib.format.read_array(io.BufferedReader(f), allow_pickle=False)
+
+
+def _vector(obj) -> list[float] | None:
+    vector = obj.vector
+    if isinstance(vector, dict):
+        vector = vector.get("default") or next(iter(vector.values()), None)
+    return vector
+
+
+class _ShardWriter:
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.shards = 0
+        self.count = 0
+        self.dimensions = None
+        self.clear()
+
+    def clear(self):
+        self.vectors: list[list[float]] = []
+        self.uuids: list[bytes] = []
+        self.properties: list[str] = []
+
+    def add(self, obj):
+        vector = _vector(obj)
+        if vector is None:
+            raise ValueError(f"Object {obj.uuid} has no vector")
+        if self.dimensions is None:
+            self.dimensions = len(vector)
+        self.vectors.append(vector)
+        self.uuids.append(uuid.UUID(str(obj.uuid)).bytes)
+        self.properties.append(json.dumps(obj.properties, ensure_ascii=False, default=str))
+
+    def flush(self):
+        if not self.uuids:
+            return
+        name = f"{self.shards:06d}"
+        _write_array(self.archive, f"vectors_{name}", np.asarray(self.vectors, dtype=np.float32))
+        _write_array(self.archive, f"uuids_{name}", _bytes_array(b"".join(self.uuids)).reshape(-1, 16))
+        _write_array(self.archive, f"properties_{name}", _bytes_array("\n".join(self.properties).encode("utf-8")))
+        self.shards += 1
+        self.count += len(self.uuids)
+        self.clear()
+
+
+# Stream every object of the collection (properties, uuid, vector) into a snapshot file
+def export_snapshot(collection, path: str, manifest: dict, shard_size: int = 1000) -> int:
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        writer = _ShardWriter(archive)
+        for obj in collection.iterator(include_vector=True):
+            writer.add(obj)
+            if len(writer.uuids) >= shard_size:
+                writer.flush()
+        writer.flush()
+
+        manifest = {**manifest, "count": writer.count, "shards": writer.shards, "dimensions": writer.dimensions}
+        _write_array(archive, "manifest", _bytes_array(json.dumps(manifest).encode("utf-8")))
+    return writer.count
+
+
+def read_manifest(path: str) -> dict:
+    with zipfile.ZipFile(path, "r") as archive:
+        return json.loads(_read_array(archive, "manifest").tobytes().decode("utf-8"))
+
+
+# Yield (uuid, properties, vector) shard by shard
+def iter_snapshot(path: str):
+
+    with zipfile.ZipFile(path, "r") as archive:
+        manifest = json.loads(_read_array(archive, "manifest").tobytes().decode("utf-8"))
+        for shard in range(manifest["shards"]):
+            name = f"{shard:06d}"
+            vectors = _read_array(archive, f"vectors_{name}")
+            uuids = _read_array(archive, f"uuids_{name}")
+            properties = _read_array(archive, f"properties_{name}").tobytes().decode("utf-8").split("\n")
+            for raw_uuid, props, vector in zip(uuids, properties, vectors):
+                # properties that were never set are exported as null, leave them unset again
+                props = {key: value for key, value in json.loads(props).items() if value is not None}
+                yield str(uuid.UUID(bytes=raw_uuid.tobytes())), props, vector.tolist()
+
+
+# Bulk-load a snapshot into the collection with the batch API. Returns (imported, failed)
+def import_snapshot(collection, path: str, batch_size: int = 200) -> tuple[int, int]:
+
+    imported = 0
+    with collection.batch.fixed_size(batch_size=batch_size) as batch:
+        for object_uuid, properties, vector in iter_snapshot(path):
+            batch.add_object(properties=properties, uuid=object_uuid, vector=vector)
+            imported += 1
+    failed = len(collection.batch.failed_objects)
+    for failed_object in collection.batch.failed_objects[:5]:
+        print(f"Failed to import {failed_object.object_.uuid}: {failed_object.message}")
+    return imported - failed, failed
@@ -0,0 +1,169 @@
+import os
+import time
+from queue import Queue, Empty
+from db.checkpoint import IngestCheckpoint
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # optional dependency - fall back to polling
+    Observer = None
+    FileSystemEventHandler = object
+
+"""
+Watch mode: keep the database in sync with a documents folder.
+
+File system events come from watchdog (inotify on Linux, FSEvents on macOS) when it
+is installed, otherwise the folder is polled. Events are debounced: a file is only
+ingested once it had no events for `debounce` seconds and its size and mtime stopped
+changing, so half-copied PDFs are never read.
+
+- new file -> ingested
+- modified file -> ingested again, replacing the old chunks
+- deleted file -> chunks deleted
+
+Only the files named by events are touched, the folder is listed once at startup to
+catch up on changes made while the watcher was not running.
+"""
+
+
+# Events that change a file - reading a PDF (opened, closed_no_write) must not queue it,
+# load_documents, the OCR workers and PDF viewers open the files in the folder too
+CHANGE_EVENTS = {"created", "modified", "closed", "deleted", "moved"}
+
+
+class _EventHandler(FileSystemEventHandler):
+
+    def __init__(self, events: Queue):
+        self.events = events
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path and str(path).lower().endswith(".pdf"):
+                self.events.put(os.path.abspath(path))
+
+
+class FolderWatcher:
+
+    def __init__(self, db, folder: str, debounce: float = 2.0, poll_interval: float = 2.0,
+                 use_polling: bool = False, checkpoint_path: str | None = None):
+        self.db = db
+        self.folder = os.path.abspath(folder)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or Observer is None
+        # knowledge bases keep their own checkpoint, see HybridDB.checkpoint_path
+        self.checkpoint_path = checkpoint_path or getattr(db, "checkpoint_path", None)
+        self.events: Queue = Queue()
+        # path -> (time of the last event, fingerprint seen at that time)
+        self.pending: dict[str, tuple[float, dict | None]] = {}
+        self.snapshot: dict[str, dict] = {}
+        self.last_poll = 0.0
+        self.observer = None
+
+    def _fingerprint(self, path: str) -> dict | None:
+        try:
+            return IngestCheckpoint.fingerprint(path)
+        except FileNotFoundError:
+            return None
+
+    def _list_folder(self) -> dict[str, dict]:
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                    stat = entry.stat()
+                    files[os.path.abspath(entry.path)] = {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+        return files
+
+    # Queue everything that changed while the watcher was not running
+    def _catch_up(self):
+        self.snapshot = self._list_folder()
+        checkpoint = IngestCheckpoint(self.checkpoint_path)
+        for path in self.snapshot:
+            if not checkpoint.is_done(path):
+                self.events.put(path)
+        for path in checkpoint.files:
+            if os.path.dirname(path) == self.folder and path not in self.snapshot:
+                self.events.put(path)
+
+    # Polling fallback - compare the folder listing with the previous one
+    def _poll(self):
+        current = self._list_folder()
+        for path in current.keys() | self.snapshot.keys():
+            if current.get(path) != self.snapshot.get(path):
+                self.events.put(path)
+        self.snapshot = current
+
+    def _ingest(self, path: str):
+        checkpoint = IngestCheckpoint(self.checkpoint_path)
+        if checkpoint.is_done(path):
+            return
+        if os.path.abspath(path) in checkpoint.files:
+            # changed file - load_documents replaces the chunks of the old version
+            print(f"Updating {os.path.basename(path)}")
+        else:
+            print(f"Ingesting {os.path.basename(path)}")
+        self.db.load_documents(uploaded_documents=[path])
+
+    def _remove(self, path: str):
+        print(f"Removing {os.path.basename(path)}")
+        deleted = self.db.delete_source(path)
+        print(f"Deleted {deleted} chunks of {os.path.basename(path)}")
+
+    # One iteration of the watch loop: collect events, handle files that settled
+    def tick(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+
+        if self.use_polling and now - self.last_poll >= self.poll_interval:
+            self._poll()
+            self.last_poll = now
+
+        while True:
+            try:
+                path = self.events.get_nowait()
+            except Empty:
+                break
+            self.pending[path] = (now, self._fingerprint(path))
+
+        for path, (last_event, fingerprint) in list(self.pending.items()):
+            if now - last_event < self.debounce:
+                continue
+            current = self._fingerprint(path)
+            if current != fingerprint:
+                # still being written
+                self.pending[path] = (now, current)
+                continue
+            del self.pending[path]
+            try:
+                if current is None:
+                    self._remove(path)
+                else:
+                    self._ingest(path)
+            except Exception as e:
+                print(f"Error processing {path}: {e}")
+
+    def start(self):
+        self._catch_up()
+        if not self.use_polling:
+            self.observer = Observer()
+            self.observer.schedule(_EventHandler(self.events), self.folder, recursive=False)
+            self.observer.start()
+        print(f"Watching {self.folder} ({'polling' if self.use_polling else 'file system events'})")
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+
+    def run(self):
+        self.start()
+        try:
+            while True:
+                self.tick()
+                time.sleep(0.5)
+        finally:
+            self.stop()
@@ -8,6 +8,8 @@ from pathlib import Path
 # app imports
 from core.chain import DokuragChain
 from db.hybrid import HybridDB
+from db.chunking import RecursiveChunker, LayoutChunker, corpus_stats
+from db.watcher import FolderWatcher
 
 # Prompt the LLM with the given text.
 def prompt_llm(text: str) -> str:
@@ -16,9 +18,9 @@ def prompt_llm(text: str) -> str:
     return chain.simple_invoke(text)
 
 # Prompt the LLM with text and (future) relevant documents from the database.
-def prompt_with_db_documents(text: str) -> str:
+def prompt_with_db_documents(text: str, tenants: list[str] | None = None) -> str:
 
-    chain = DokuragChain()
+    chain = DokuragChain(tenants=tenants)
     # DB retrieval not wired yet; call invoke with no docs which uses the RAG template
     return chain.invoke(question=text, documents=None)
 
@@ -27,37 +29,149 @@ Prompt the LLM with a question and user-provided docs.
 
 The context provided to the chain contains only two fields: `question` and `docs`.
 """
-def prompt_with_upload_documents(text: str, documents: list[str]) -> str:
+def prompt_with_upload_documents(text: str, documents: list[str], tenants: list[str] | None = None) -> str:
 
-    chain = DokuragChain()
+    chain = DokuragChain(tenants=tenants)
     return chain.invoke(question=text, documents=documents)
 
 # Store documents in the data folder in the database.
-def store_documents() -> str:
+def store_documents(resume: bool = True, tenants: list[str] | None = None) -> str:
 
-    db = HybridDB("/Users/gier/projects/dokurag/data/")
+    db = HybridDB("/Users/gier/projects/dokurag/data/", tenants=tenants)
     try: 
-        db.load_documents(uploaded_documents=None)
+        report = db.load_documents(uploaded_documents=None, resume=resume)
+        if report is not None and (report.failed_chunks or report.failed_files):
+            return f"Chunks stored in the database, {report.failed_chunks} chunks and {len(report.failed_files)} files failed"
         return "Chunks stored in the database"
     except Exception as e:
         return f"Error storing documents: {e}"
     
-def check_db() -> str:
-    db = HybridDB()
+def check_db(tenants: list[str] | None = None) -> str:
+    db = HybridDB(tenants=tenants)
     try:
-        count = len(db.db.get()['ids'])
+        count = db.count()
         return f"Chunks stored in the database: {count}"
     except Exception as e:
         return f"Error checking documents: {e}"
-    
-def delete_db_entries() -> str:
-    db = HybridDB()
+
+# Chunk and page statistics for every source file in the database.
+def db_stats(tenants: list[str] | None = None) -> str:
+    db = HybridDB(tenants=tenants)
+    try:
+        stats = db.source_stats()
+        if not stats:
+            return "No chunks stored in the database"
+        lines = [f"{'source':<30} {'chunks':>8} {'pages':>10}"]
+        for source, row in stats.items():
+            pages = f"{row['first_page']}-{row['last_page']}"
+            lines.append(f"{source:<30} {row['chunks']:>8} {pages:>10}")
+        total = sum(row["chunks"] for row in stats.values())
+        lines.append(f"{len(stats)} sources, {total} chunks")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error reading database stats: {e}"
+
+# Delete all chunks of a single source file.
+def delete_source_entries(source: str, tenants: list[str] | None = None) -> str:
+    db = HybridDB(tenants=tenants)
+    try:
+        deleted = db.delete_source(source)
+        return f"Deleted {deleted} chunks of {os.path.basename(source)}"
+    except Exception as e:
+        return f"Error deleting entries of {source}: {e}"
+
+# Export every chunk with its vector into a snapshot file.
+def export_db(path: str, tenants: list[str] | None = None) -> str:
+    db = HybridDB(tenants=tenants)
+    try:
+        count = db.export_snapshot(path)
+        return f"Exported {count} chunks to {path}"
+    except Exception as e:
+        return f"Error exporting snapshot: {e}"
+
+# Load a snapshot file into the database without embedding anything.
+def import_db(path: str, tenants: list[str] | None = None) -> str:
+    db = HybridDB(tenants=tenants)
     try:
-        db.db.delete(ids=db.db.get()["ids"])
+        imported, failed = db.import_snapshot(path)
+        if failed:
+            return f"Imported {imported} chunks from {path}, {failed} failed"
+        return f"Imported {imported} chunks from {path}"
+    except Exception as e:
+        return f"Error importing snapshot: {e}"
+
+def delete_db_entries(tenants: list[str] | None = None) -> str:
+    db = HybridDB(tenants=tenants)
+    try:
+        db.reset_collection()
+        if tenants:
+            return f"All entries deleted from knowledge base {', '.join(tenants)}"
         return "All entries deleted from the database"
     except Exception as e:
         return f"Error deleting entries: {e}"
 
+# Keep the database in sync with a folder until interrupted.
+def watch_documents(folder: str, polling: bool = False, tenants: list[str] | None = None) -> str:
+
+    db = HybridDB(folder, tenants=tenants)
+    watcher = FolderWatcher(db, folder, use_polling=polling)
+    watcher.run()
+    return "Watcher stopped"
+
+# Create a knowledge base (tenant) - it can also be created implicitly by storing documents with --kb.
+def create_kb(name: str) -> str:
+    db = HybridDB()
+    try:
+        db.create_kb(name)
+        return f"Knowledge base {name} created"
+    except Exception as e:
+        return f"Error creating knowledge base {name}: {e}"
+
+# List knowledge bases with their status and chunk count.
+def list_kbs() -> str:
+    db = HybridDB()
+    try:
+        kbs = db.list_kbs()
+        if not kbs:
+            return "No knowledge bases found"
+        lines = [f"{'knowledge base':<30} {'status':>10} {'chunks':>8}"]
+        for name, row in kbs.items():
+            chunks = "-" if row["chunks"] is None else row["chunks"]
+            lines.append(f"{name:<30} {row['status']:>10} {chunks:>8}")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error listing knowledge bases: {e}"
+
+# Drop a knowledge base with all its chunks.
+def drop_kb(name: str) -> str:
+    db = HybridDB()
+    try:
+        db.drop_kb(name)
+        return f"Knowledge base {name} dropped"
+    except Exception as e:
+        return f"Error dropping knowledge base {name}: {e}"
+
+# Activate, deactivate or offload a knowledge base.
+def set_kb_status(name: str, status: str) -> str:
+    db = HybridDB()
+    try:
+        db.set_kb_status(name, status)
+        return f"Knowledge base {name} is now {status}"
+    except Exception as e:
+        return f"Error changing status of knowledge base {name}: {e}"
+
+# Chunk count and token totals of the data folder for each chunker - nothing is embedded or stored.
+def chunk_stats(folder: str) -> str:
+    files = sorted(str(path) for path in Path(folder).glob("*.pdf"))
+    if not files:
+        return f"No PDF files found in '{folder}'"
+    lines = [f"{'chunker':<10} {'files':>6} {'pages':>6} {'chunks':>8} {'tokens':>10} {'tokens/chunk':>13}"]
+    for chunker in (RecursiveChunker(), LayoutChunker(max_tokens=int(os.getenv("CHUNK_TOKENS", "400")))):
+        stats = corpus_stats(files, chunker)
+        per_chunk = stats["tokens"] / stats["chunks"] if stats["chunks"] else 0
+        lines.append(f"{chunker.name:<10} {stats['files']:>6} {stats['pages']:>6} {stats['chunks']:>8} {stats['tokens']:>10} {per_chunk:>13.1f}")
+    return "\n".join(lines)
+
 """
 Run a specific test.
 
@@ -186,7 +300,20 @@ Examples:
   %(prog)s -pd "Explain this concept"         # Prompt with retrieval form docs from db
   %(prog)s -pdm "your question" file1.pdf file2.pdf  # Prompt with docs you provide
   %(prog)s -s                                 # Store all documents from the data folder in the database
+  %(prog)s -s --no-resume                     # Store all documents, ignoring the ingestion checkpoint
+  %(prog)s -w data                            # Watch a folder and ingest new, changed and deleted PDFs
   %(prog)s -c                                 # Check how many documents are stored in the database
+  %(prog)s -st                                # Show chunk and page statistics per source file
+  %(prog)s -ds ZMP_1006715.pdf                # Delete all chunks of one source file
+  %(prog)s -cs data                           # Compare chunk and token totals of both chunkers
+  %(prog)s -ex snapshot.npz                   # Export all chunks with vectors to a snapshot file
+  %(prog)s -im snapshot.npz                   # Import a snapshot file without re-embedding
+  %(prog)s -kbc manuals                       # Create the knowledge base "manuals"
+  %(prog)s -s --kb manuals                    # Store the data folder in the knowledge base "manuals"
+  %(prog)s -pd "question" --kb manuals,specs  # Prompt with retrieval from two knowledge bases
+  %(prog)s -kbl                               # List knowledge bases with status and chunk count
+  %(prog)s -kbi manuals                       # Deactivate a knowledge base that is not in use
+  %(prog)s -kbx manuals                       # Drop a knowledge base with all its chunks
   %(prog)s -d                                 # Delete all entries from the database - used only for testing
   %(prog)s -t  testname                       # Run specific test
   %(prog)s -ta                                # Run all tests
@@ -224,12 +351,94 @@ Examples:
         help="Store all documents from the data folder in the database"
     )
 
+    group.add_argument(
+        "-w", "--watch",
+        type=str,
+        metavar="FOLDER",
+        help="Watch a folder and keep the database in sync with its PDF files"
+    )
+
     group.add_argument(
         "-c", "--check-db",
         action="store_true",
         help="Check how many documents are stored in the database"
     )
 
+    group.add_argument(
+        "-st", "--stats",
+        action="store_true",
+        help="Show chunk and page statistics per source file"
+    )
+
+    group.add_argument(
+        "-cs", "--chunk-stats",
+        type=str,
+        metavar="FOLDER",
+        help="Report chunk count and token totals of a folder for each chunker"
+    )
+
+    group.add_argument(
+        "-ds", "--delete-source",
+        type=str,
+        metavar="SOURCE",
+        help="Delete all chunks of the given source file from the database"
+    )
+
+    group.add_argument(
+        "-ex", "--export-snapshot",
+        type=str,
+        metavar="PATH",
+        help="Export all chunks with their vectors to a .npz snapshot file"
+    )
+
+    group.add_argument(
+        "-im", "--import-snapshot",
+        type=str,
+        metavar="PATH",
+        help="Import a .npz snapshot file into the database without re-embedding"
+    )
+
+    group.add_argument(
+        "-kbc", "--kb-create",
+        type=str,
+        metavar="NAME",
+        help="Create a knowledge base"
+    )
+
+    group.add_argument(
+        "-kbl", "--kb-list",
+        action="store_true",
+        help="List knowledge bases with their status and chunk count"
+    )
+
+    group.add_argument(
+        "-kbx", "--kb-drop",
+        type=str,
+        metavar="NAME",
+        help="Drop a knowledge base with all its chunks"
+    )
+
+    group.add_argument(
+        "-kba", "--kb-activate",
+        type=str,
+        metavar="NAME",
+        help="Activate a knowledge base"
+    )
+
+    group.add_argument(
+        "-kbi", "--kb-deactivate",
+        type=str,
+        metavar="NAME",
+        help="Deactivate a knowledge base - unloaded from memory, kept on disk"
+    )
+
+    group.add_argument(
+        "-kbo", "--kb-offload",
+        type=str,
+        metavar="NAME",
+        help="Offload a knowledge base to cloud storage (needs the Weaviate offload-s3 module)"
+    )
+
     group.add_argument(
         "-d", "--delete-db-entries",
         action="store_true",
@@ -248,6 +457,25 @@ Examples:
         action="store_true",
         help="Run all tests"
     )
+
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Ignore the ingestion checkpoint and process every file again (used with -s)"
+    )
+
+    parser.add_argument(
+        "--kb",
+        type=str,
+        metavar="NAME[,NAME]",
+        help="Knowledge base(s) to work on instead of the global collection - several only for prompts and -c"
+    )
+
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Poll the folder instead of using file system events (used with -w)"
+    )
     
     return parser
 
@@ -290,6 +518,8 @@ def main():
     parser = create_parser()
     args = parser.parse_args()
     
+    tenants = [name.strip() for name in args.kb.split(",") if name.strip()] if args.kb else None
+
     try:
         
         if args.prompt:
@@ -297,26 +527,76 @@ def main():
             print(result)
         
         elif args.prompt_docs:
-            result = prompt_with_db_documents(args.prompt_docs)
+            result = prompt_with_db_documents(args.prompt_docs, tenants=tenants)
             print(result)
 
         elif args.prompt_docs_multiple:
             # First argument is the question; remaining are doc paths
             question = args.prompt_docs_multiple[0]
             docs = args.prompt_docs_multiple[1:] if len(args.prompt_docs_multiple) > 1 else []
-            result = prompt_with_upload_documents(question, docs)
+            result = prompt_with_upload_documents(question, docs, tenants=tenants)
             print(result)
         
         elif args.store_documents:
-            result = store_documents()
+            result = store_documents(resume=not args.no_resume, tenants=tenants)
             print(result)
         
+        elif args.watch:
+            if validate_folder_path(args.watch):
+                result = watch_documents(args.watch, polling=args.polling, tenants=tenants)
+                print(result)
+
         elif args.check_db:
-            result = check_db()
+            result = check_db(tenants=tenants)
             print(result)
         
+        elif args.stats:
+            result = db_stats(tenants=tenants)
+            print(result)
+
+        elif args.chunk_stats:
+            if validate_folder_path(args.chunk_stats):
+                result = chunk_stats(args.chunk_stats)
+                print(result)
+
+        elif args.delete_source:
+            result = delete_source_entries(args.delete_source, tenants=tenants)
+            print(result)
+        
+        elif args.export_snapshot:
+            result = export_db(args.export_snapshot, tenants=tenants)
+            print(result)
+
+        elif args.import_snapshot:
+            result = import_db(args.import_snapshot, tenants=tenants)
+            print(result)
+
+        elif args.kb_create:
+            result = create_kb(args.kb_create)
+            print(result)
+
+        elif args.kb_list:
+            result = list_kbs()
+            print(result)
+
+        elif args.kb_drop:
+            result = drop_kb(args.kb_drop)
+            print(result)
+
+        elif args.kb_activate:
+            result = set_kb_status(args.kb_activate, "active")
+            print(result)
+
+        elif args.kb_deactivate:
+            result = set_kb_status(args.kb_deactivate, "inactive")
+            print(result)
+
+        elif args.kb_offload:
+            result = set_kb_status(args.kb_offload, "offloaded")
+            print(result)
+
         elif args.delete_db_entries:
-            result = delete_db_entries()
+            result = delete_db_entries(tenants=tenants)
             print(result)
         
         elif args.test:
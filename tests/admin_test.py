@@ -0,0 +1,74 @@
+"""unittest-based tests for the admin functions count, source_stats and delete_source - no Weaviate server needed."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.hybrid import HybridDB
+from db.checkpoint import IngestCheckpoint
+from tests.fakes import FakeCollection, make_db
+
+CHUNKS = (
+    [{"source": "ZMP_1006715.pdf", "page": page} for page in (1, 1, 2, 5)]
+    + [{"source": "ZMP_1006715 (1).pdf", "page": 1}, {"source": "zmp-1006715.PDF", "page": 3}]
+)
+
+class TestAdmin(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_db(self, tokenization: str = "field") -> HybridDB:
+        self.collection = FakeCollection(CHUNKS, tokenization)
+        return make_db(self.collection, state_dir=self.tmp.name)
+
+    def test_count(self):
+        self.assertEqual(self.make_db().count(), 6)
+
+    def test_source_stats(self):
+        stats = self.make_db().source_stats()
+        self.assertEqual(list(stats), sorted(stats))
+        self.assertEqual(stats["ZMP_1006715.pdf"], {"chunks": 4, "first_page": 1, "last_page": 5})
+        self.assertEqual(stats["zmp-1006715.PDF"]["chunks"], 1)
+
+    # more sources than Weaviate returns groups by default
+    def test_source_stats_all_sources(self):
+        self.collection = FakeCollection([{"source": f"ZMP_{i}.pdf", "page": 1} for i in range(152)])
+        stats = make_db(self.collection, state_dir=self.tmp.name).source_stats()
+        self.assertEqual(len(stats), 152)
+
+    def test_source_stats_empty(self):
+        self.assertEqual(make_db(FakeCollection(), state_dir=self.tmp.name).source_stats(), {})
+
+    # only the chunks of the exact file name are deleted, the path is reduced to the file name
+    def test_delete_source(self):
+        db = self.make_db()
+        self.assertEqual(db.delete_source("/data/ZMP_1006715.pdf"), 4)
+        self.assertEqual(self.collection.sources(), ["ZMP_1006715 (1).pdf", "zmp-1006715.PDF"])
+
+    # collections with a word tokenized source fall back to deleting the exact matches by id
+    def test_delete_source_word_tokenized(self):
+        db = self.make_db("word")
+        self.assertEqual(db.delete_source("ZMP_1006715.pdf"), 4)
+        self.assertEqual(self.collection.sources(), ["ZMP_1006715 (1).pdf", "zmp-1006715.PDF"])
+
+    # a deleted file is ingested again when it shows up later
+    def test_delete_source_forgets_checkpoint(self):
+        db = self.make_db()
+        path = os.path.join(self.tmp.name, "ZMP_1006715.pdf")
+        Path(path).write_bytes(b"%PDF-1.4")
+        IngestCheckpoint(db.checkpoint_path).mark_done(path)
+
+        db.delete_source(path)
+        self.assertFalse(IngestCheckpoint(db.checkpoint_path).is_done(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""unittest-based tests for the ingestion checkpoint and retry helpers."""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.checkpoint import IngestCheckpoint, DeadLetterQueue, IngestReport, with_retries
+
+class TestIngestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmp.name, "ZMP_1.pdf")
+        with open(self.pdf, "wb") as f:
+            f.write(b"%PDF-1.4")
+        self.path = os.path.join(self.tmp.name, "state", "checkpoint.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # batches survive a restart and a finished file is skipped
+    def test_resume(self):
+        checkpoint = IngestCheckpoint(self.path)
+        checkpoint.mark_batch(self.pdf, 0)
+        checkpoint.mark_batch(self.pdf, 1)
+
+        resumed = IngestCheckpoint(self.path)
+        self.assertEqual(resumed.batches_done(self.pdf), 2)
+        self.assertFalse(resumed.is_done(self.pdf))
+
+        resumed.mark_done(self.pdf)
+        self.assertTrue(IngestCheckpoint(self.path).is_done(self.pdf))
+
+    # a modified file starts over
+    def test_changed_file_is_not_done(self):
+        checkpoint = IngestCheckpoint(self.path)
+        checkpoint.mark_done(self.pdf)
+        with open(self.pdf, "ab") as f:
+            f.write(b"more bytes")
+        self.assertFalse(checkpoint.is_done(self.pdf))
+        self.assertEqual(checkpoint.batches_done(self.pdf), 0)
+
+    def test_dead_letter(self):
+        queue = DeadLetterQueue(os.path.join(self.tmp.name, "dead_letter.jsonl"))
+        queue.add("id-1", {"text": "chunk", "source": "ZMP_1.pdf"}, "timeout")
+        with open(queue.path, encoding="utf-8") as f:
+            record = json.loads(f.readline())
+        self.assertEqual(record["uuid"], "id-1")
+        self.assertEqual(record["error"], "timeout")
+        self.assertEqual(queue.count, 1)
+
+
+class TestWithRetries(unittest.TestCase):
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise TimeoutError("insert timed out")
+            return "ok"
+
+        retries = []
+        result = with_retries(flaky, attempts=5, base_delay=0, on_retry=lambda *args: retries.append(args))
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(retries), 2)
+
+    def test_gives_up(self):
+        def broken():
+            raise TimeoutError("insert timed out")
+
+        with self.assertRaises(TimeoutError):
+            with_retries(broken, attempts=2, base_delay=0)
+
+    def test_does_not_retry_other_errors(self):
+        calls = []
+
+        def bug():
+            calls.append(1)
+            raise ValueError("bad input")
+
+        with self.assertRaises(ValueError):
+            with_retries(bug, attempts=5, base_delay=0, retry_on=(TimeoutError,))
+        self.assertEqual(len(calls), 1)
+
+
+def allocate_spike(mb: int):
+    spike = bytearray(mb * 2 ** 20)
+    for i in range(0, len(spike), 4096):
+        spike[i] = 1
+    del spike
+
+
+class TestMemory(unittest.TestCase):
+    # memory freed again before the next sample still counts for the high-water mark
+    def test_peak_includes_freed_spike(self):
+        report = IngestReport()
+        report.start_memory_tracking()
+        if report.memory_scope != "run":
+            self.skipTest("the kernel's peak cannot be reset here")
+        allocate_spike(256)
+        report.stop_memory_tracking()
+        self.assertGreaterEqual(report.peak_rss_mb, report.start_rss_mb + 200)
+
+    # a later run in the same process does not report the peak of an earlier one
+    def test_peak_is_per_run(self):
+        allocate_spike(256)
+        report = IngestReport()
+        report.start_memory_tracking()
+        report.track_memory()
+        report.stop_memory_tracking()
+        self.assertNotEqual(report.memory_scope, "process")
+        self.assertLess(report.peak_rss_mb, report.start_rss_mb + 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""unittest-based tests for the layout chunker."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.chunking import LayoutChunker, Unit
+
+# one token per word keeps the budgets easy to reason about
+def count_words(text: str) -> int:
+    return len(text.split())
+
+HEADER = "Product code | METEL code | STK number"
+
+class TestLayoutChunker(unittest.TestCase):
+    def setUp(self):
+        self.chunker = LayoutChunker(max_tokens=20, counter=count_words)
+
+    def units(self, units: list[Unit]) -> list[tuple[Unit, int, int]]:
+        result, offset = [], 0
+        for unit in units:
+            result.append((unit, offset, offset + len(unit.text)))
+            offset += len(unit.text) + 1
+        return result
+
+    # rows stay intact and the header is repeated in the next chunk
+    def test_table_rows_and_header(self):
+        rows = [Unit(HEADER, "row")] + [
+            Unit(f"40503000067{i:02d} | OSRH64633HLX | 47365{i:02d}", "row", HEADER) for i in range(6)
+        ]
+        chunks = self.chunker._pack(self.units(rows))
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(count_words(chunk.text), 20)
+            self.assertTrue(chunk.text.startswith(HEADER))
+        rows_out = [line for chunk in chunks for line in chunk.text.split("\n") if line != HEADER]
+        self.assertEqual(rows_out, [unit.text for unit in rows[1:]])
+
+    # a heading is never the last unit of a chunk
+    def test_heading_moves_with_section(self):
+        units = [
+            Unit("word " * 15, "text"),
+            Unit("Electrical Data", "heading"),
+            Unit("Nominal wattage | 150 W", "row"),
+        ]
+        chunks = self.chunker._pack(self.units(units))
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(chunks[1].text.startswith("Electrical Data"))
+
+    # offsets point to the covered span of the page text
+    def test_offsets(self):
+        text = "Safety advice\n\nHalogen lamps may only be operated in suitable luminaires.\n\nDetailed information on request."
+        chunker = LayoutChunker(max_tokens=8, counter=count_words)
+        chunks = chunker.split_text(text)
+        for chunk in chunks:
+            self.assertEqual(text[chunk.start:chunk.end], chunk.text)
+        self.assertEqual(" ".join(c.text for c in chunks).split(), text.split())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+"""Fakes for the tests that need a HybridDB without a Weaviate server or an embedding model."""
+
+import os
+import re
+import time
+import uuid
+from types import SimpleNamespace
+import fitz
+from db.hybrid import HybridDB
+from db.chunking import Chunk
+
+def words(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+class FakeEmbedder:
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.error is not None:
+            raise self.error
+        return [[0.1, 0.2] for _ in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.error is not None:
+            raise self.error
+        return [0.1, 0.2]
+
+"""
+In-memory collection with the filter semantics of Weaviate.
+
+tokenization="field" -> equal on source matches the whole value
+tokenization="word" -> equal on source matches every value that contains all words
+
+insert_many plays back a script, one step per call. A step is either an exception
+to raise or a set of positions in the call that are rejected with a per-object error.
+delete_many raises the exceptions of delete_script, one per call, before it deletes.
+bm25 and near_vector sleep for leg_delays[name] and raise leg_errors[name] when set.
+Every insert_many call is recorded, deletes and inserts also in the order they happen.
+"""
+class FakeCollection:
+
+    def __init__(self, objects: list[dict] | None = None, tokenization: str = "field",
+                 script: list | None = None, delete_script: list | None = None, tenant: str | None = None):
+        self.objects = [{**obj, "uuid": obj.get("uuid") or uuid.uuid4()} for obj in objects or []]
+        self.tokenization = tokenization
+        self.script = list(script or [])
+        self.delete_script = list(delete_script or [])
+        self.leg_delays: dict[str, float] = {}
+        self.leg_errors: dict[str, Exception] = {}
+        self.tenant = tenant
+        self.tenant_collections: dict[str, FakeCollection] = {}
+        self.calls: list[list[str]] = []
+        self.events: list[tuple[str, object]] = []
+        self.data = SimpleNamespace(insert_many=self.insert_many, delete_many=self.delete_many)
+        self.aggregate = SimpleNamespace(over_all=self.over_all)
+        self.query = SimpleNamespace(fetch_objects=self.fetch_objects, bm25=self.bm25, near_vector=self.near_vector)
+
+    def with_tenant(self, tenant: str):
+        return self.tenant_collections.setdefault(tenant, FakeCollection(tokenization=self.tokenization, tenant=tenant))
+
+    def matches(self, where, obj: dict) -> bool:
+        if where.target == "_id":
+            return str(obj["uuid"]) in [str(value) for value in where.value]
+        if self.tokenization == "word":
+            return words(where.value) <= words(obj["source"])
+        return obj["source"] == where.value
+
+    def insert_many(self, objects):
+        self.calls.append([str(obj.uuid) for obj in objects])
+        self.events.append(("insert", len(objects)))
+        step = self.script.pop(0) if self.script else set()
+        if isinstance(step, Exception):
+            raise step
+        for i, obj in enumerate(objects):
+            if i not in step:
+                # same id -> the object is replaced
+                self.objects = [stored for stored in self.objects if str(stored["uuid"]) != str(obj.uuid)]
+                self.objects.append({**obj.properties, "uuid": obj.uuid})
+        return SimpleNamespace(errors={i: SimpleNamespace(message=f"rejected {i}") for i in step})
+
+    def delete_many(self, where):
+        self.events.append(("delete", where.value))
+        if self.delete_script:
+            raise self.delete_script.pop(0)
+        matched = [obj for obj in self.objects if self.matches(where, obj)]
+        self.objects = [obj for obj in self.objects if obj not in matched]
+        return SimpleNamespace(matches=len(matched), successful=len(matched), failed=0)
+
+    def over_all(self, total_count=False, group_by=None, return_metrics=None):
+        if group_by is None:
+            return SimpleNamespace(total_count=len(self.objects))
+        groups = {}
+        for obj in self.objects:
+            groups.setdefault(obj["source"], []).append(obj["page"])
+        return SimpleNamespace(groups=[
+            SimpleNamespace(
+                grouped_by=SimpleNamespace(value=source),
+                total_count=len(pages),
+                properties={"page": SimpleNamespace(minimum=min(pages), maximum=max(pages))},
+            )
+            # Weaviate returns 100 groups when no limit is given
+            for source, pages in list(groups.items())[:group_by.limit or 100]
+        ])
+
+    def fetch_objects(self, filters, limit, offset=0, return_properties=None):
+        found = [obj for obj in self.objects if self.matches(filters, obj)][offset:offset + limit]
+        return SimpleNamespace(objects=[
+            SimpleNamespace(uuid=obj["uuid"], properties={"source": obj["source"]}) for obj in found
+        ])
+
+    def _leg(self, name: str):
+        time.sleep(self.leg_delays.get(name, 0))
+        if name in self.leg_errors:
+            raise self.leg_errors[name]
+
+    @staticmethod
+    def _result_object(obj: dict, **metadata) -> SimpleNamespace:
+        properties = {key: value for key, value in obj.items() if key != "uuid"}
+        return SimpleNamespace(uuid=obj["uuid"], properties=properties, metadata=SimpleNamespace(**metadata))
+
+    # objects sharing words with the query, most shared words first
+    def bm25(self, query, limit, return_properties=None, return_metadata=None):
+        self._leg("bm25")
+        scored = [(len(words(query) & words(obj.get("text", ""))), obj) for obj in self.objects]
+        scored = sorted((item for item in scored if item[0]), key=lambda item: -item[0])[:limit]
+        return SimpleNamespace(objects=[self._result_object(obj, score=float(score)) for score, obj in scored])
+
+    # every object in stored order, the distance grows with the position
+    def near_vector(self, near_vector, limit, return_properties=None, return_metadata=None):
+        self._leg("near_vector")
+        return SimpleNamespace(objects=[
+            self._result_object(obj, distance=0.1 * i) for i, obj in enumerate(self.objects[:limit])
+        ])
+
+    def sources(self) -> list[str]:
+        return sorted(obj["source"] for obj in self.objects)
+
+class FakeClient:
+
+    def __init__(self, collection: FakeCollection):
+        self.collections = SimpleNamespace(get=lambda name: collection)
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def is_connected(self) -> bool:
+        return True
+
+# One chunk per line of the page text, records the pages it was given
+class FakeChunker:
+    name = "fake"
+
+    def __init__(self):
+        self.pages: list[int] = []
+
+    def split_page(self, page: fitz.Page) -> list[Chunk]:
+        self.pages.append(page.number)
+        return self.split_text(page.get_text())
+
+    def split_text(self, text: str) -> list[Chunk]:
+        return [Chunk(line, 0, len(line), 1) for line in text.splitlines() if line]
+
+# OCR text for the given pages, pages in `failing` fail like a crashed worker
+class FakeOcr:
+
+    def __init__(self, texts: dict[int, str] | None = None, failing: set[int] | None = None):
+        self.texts = texts or {}
+        self.failing = failing or set()
+
+    def recognise(self, doc, file_path, page_indexes, failed=None):
+        for page_index in page_indexes:
+            if page_index in self.failing:
+                if failed is not None:
+                    failed.append(page_index)
+            elif page_index in self.texts:
+                yield page_index, self.texts[page_index]
+
+    def close(self):
+        pass
+
+# HybridDB without setup(), so no connection and no embedding model is needed
+def make_db(collection: FakeCollection | None = None, state_dir: str | None = None,
+            tenants: list[str] | None = None, embedder: FakeEmbedder | None = None) -> HybridDB:
+    collection = collection or FakeCollection()
+    db = HybridDB.__new__(HybridDB)
+    db.client = FakeClient(collection)
+    db.kb_collection_name = "Dokurag_kb"
+    db.collection_name = "Dokurag_kb" if tenants else "Dokurag_docs"
+    db.tenants = tenants or []
+    db.exact_source = collection.tokenization == "field"
+    db.checkpoint_path = os.path.join(state_dir, "checkpoint.json") if state_dir else None
+    db.embedding_model_name = "fake"
+    db._embedder = embedder or FakeEmbedder()
+    db._chunker = FakeChunker()
+    db.ocr = FakeOcr()
+    return db
@@ -0,0 +1,41 @@
+"""unittest-based tests for client-side rank fusion."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.fusion import reciprocal_rank_fusion, weighted_fusion
+
+BM25 = [("a", 12.0), ("b", 8.0), ("c", 1.0)]
+VECTOR = [("c", 0.9), ("d", 0.8), ("a", 0.5)]
+
+class TestFusion(unittest.TestCase):
+    def test_rrf_rewards_both_legs(self):
+        fused = [id_ for id_, _ in reciprocal_rank_fusion(BM25, VECTOR)]
+        # a and c are found by both legs
+        self.assertEqual(set(fused[:2]), {"a", "c"})
+        self.assertEqual(set(fused), {"a", "b", "c", "d"})
+
+    def test_alpha_extremes(self):
+        bm25_only = [id_ for id_, score in reciprocal_rank_fusion(BM25, VECTOR, alpha=0.0) if score > 0]
+        vector_only = [id_ for id_, score in weighted_fusion(BM25, VECTOR, alpha=1.0) if score > 0]
+        self.assertEqual(bm25_only, ["a", "b", "c"])
+        self.assertEqual(vector_only, ["c", "d"])
+
+    def test_weighted(self):
+        fused = dict(weighted_fusion(BM25, VECTOR, alpha=0.3))
+        # a: best bm25 score, worst vector score / c: the other way round
+        self.assertAlmostEqual(fused["a"], 0.7)
+        self.assertAlmostEqual(fused["c"], 0.3)
+        self.assertGreater(fused["a"], fused["c"])
+
+    # one leg missed its deadline
+    def test_single_leg(self):
+        self.assertEqual([id_ for id_, _ in reciprocal_rank_fusion(BM25, [])], ["a", "b", "c"])
+        self.assertEqual([id_ for id_, _ in weighted_fusion([], VECTOR)], ["c", "d", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,249 @@
+"""unittest-based tests for batch inserts and checkpointing in load_documents - no Weaviate server or embedding model needed."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+import fitz
+from langchain_core.documents import Document
+from weaviate.exceptions import WeaviateBaseError
+from db.hybrid import HybridDB, chunk_uuid
+from db.checkpoint import IngestCheckpoint, DeadLetterQueue, IngestReport
+from tests.fakes import FakeCollection, FakeEmbedder, FakeOcr, make_db
+
+def make_docs(count: int) -> list[Document]:
+    return [
+        Document(page_content=f"chunk {i}", metadata={"source": "ZMP_1.pdf", "page": 1, "chunk_index": i})
+        for i in range(count)
+    ]
+
+def write_pdf(path: str, pages: int, lines_per_page: int):
+    doc = fitz.open()
+    for page_index in range(pages):
+        text = "\n".join(f"page {page_index} line {line}" for line in range(lines_per_page))
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+class IngestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # no backoff delays
+        patcher = mock.patch("db.checkpoint.time.sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_db(self, collection: FakeCollection, embedder: FakeEmbedder | None = None) -> HybridDB:
+        return make_db(collection, state_dir=self.tmp.name, embedder=embedder)
+
+    def dead_letters(self, dead_letter: DeadLetterQueue) -> list[dict]:
+        if not os.path.exists(dead_letter.path):
+            return []
+        with open(dead_letter.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+class TestSetup(unittest.TestCase):
+
+    # admin commands work offline, the chunker (and its token encoding) is built by the first ingest
+    def test_chunker_is_lazy(self):
+        with mock.patch.object(HybridDB, "_ensure_collection"), mock.patch("db.hybrid.make_chunker") as make_chunker:
+            db = HybridDB()
+            make_chunker.assert_not_called()
+            self.assertIs(db.chunker, make_chunker.return_value)
+            self.assertIs(db.chunker, make_chunker.return_value)
+        make_chunker.assert_called_once()
+
+class TestInsertBatch(IngestTestCase):
+
+    # per-object errors, then a dropped connection: only the rejected objects are sent again
+    def test_retries_only_pending(self):
+        docs = make_docs(4)
+        ids = [chunk_uuid("ZMP_1.pdf", 1, i) for i in range(4)]
+        collection = FakeCollection(script=[{1, 3}, WeaviateBaseError("connection lost"), {0}])
+        db = self.make_db(collection)
+        dead_letter = DeadLetterQueue(os.path.join(self.tmp.name, "dead_letter.jsonl"))
+        report = IngestReport()
+
+        failed = db._insert_batch(collection, docs, dead_letter, report, attempts=3)
+
+        self.assertEqual(collection.calls, [ids, [ids[1], ids[3]], [ids[1], ids[3]]])
+        self.assertEqual(failed, 1)
+        self.assertEqual(report.chunks_inserted, 3)
+        self.assertEqual(report.failed_chunks, 1)
+        self.assertEqual(report.retries, 2)
+        self.assertEqual([(r["uuid"], r["error"]) for r in self.dead_letters(dead_letter)], [(ids[1], "rejected 0")])
+
+    # a transient error on the last attempt keeps the error of that attempt
+    def test_transient_error_exhausts_attempts(self):
+        docs = make_docs(2)
+        collection = FakeCollection(script=[{0}, WeaviateBaseError("connection lost")])
+        db = self.make_db(collection)
+        dead_letter = DeadLetterQueue(os.path.join(self.tmp.name, "dead_letter.jsonl"))
+
+        failed = db._insert_batch(collection, docs, dead_letter, IngestReport(), attempts=2)
+
+        self.assertEqual(failed, 1)
+        self.assertEqual([r["error"] for r in self.dead_letters(dead_letter)], ["connection lost"])
+
+    def test_embedding_failure(self):
+        collection = FakeCollection()
+        db = self.make_db(collection, FakeEmbedder(RuntimeError("model not found")))
+        dead_letter = DeadLetterQueue(os.path.join(self.tmp.name, "dead_letter.jsonl"))
+
+        failed = db._insert_batch(collection, make_docs(3), dead_letter, IngestReport())
+
+        self.assertEqual(failed, 3)
+        self.assertEqual(collection.calls, [])
+        self.assertEqual(len(self.dead_letters(dead_letter)), 3)
+
+class TestLoadDocuments(IngestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pdf = os.path.join(self.tmp.name, "ZMP_1.pdf")
+        write_pdf(self.pdf, pages=3, lines_per_page=2)
+
+    def checkpoint(self) -> IngestCheckpoint:
+        return IngestCheckpoint(os.path.join(self.tmp.name, "checkpoint.json"))
+
+    # a batch with failed chunks is not checkpointed and the file is not marked done
+    def test_failed_batch_is_not_checkpointed(self):
+        db = self.make_db(FakeCollection())
+        with mock.patch.object(db, "_insert_batch", side_effect=[0, 1, 0]):
+            report = db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=2)
+
+        self.assertIn(self.pdf, report.failed_files)
+        self.assertFalse(self.checkpoint().is_done(self.pdf))
+        self.assertEqual(self.checkpoint().batches_done(self.pdf), 1)
+
+    # an embedder that cannot load fails every batch, nothing is marked as stored
+    def test_embedder_failure_keeps_files_pending(self):
+        db = self.make_db(FakeCollection(), FakeEmbedder(OSError("model not found")))
+        with mock.patch("db.hybrid.DeadLetterQueue", lambda: DeadLetterQueue(os.path.join(self.tmp.name, "dead_letter.jsonl"))):
+            report = db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=2)
+
+        self.assertEqual(report.failed_chunks, 6)
+        self.assertEqual(report.processed_files, [])
+        self.assertEqual(self.checkpoint().batches_done(self.pdf), 0)
+
+        # the next run with a working embedder stores the file
+        db._embedder = FakeEmbedder()
+        with mock.patch("db.hybrid.DeadLetterQueue", lambda: DeadLetterQueue(os.path.join(self.tmp.name, "dead_letter.jsonl"))):
+            report = db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=2)
+        self.assertEqual(report.chunks_inserted, 6)
+        self.assertTrue(self.checkpoint().is_done(self.pdf))
+
+
+    # a file stored from its first batch on replaces the chunks of its previous version,
+    # a resumed file keeps the batches that are already stored
+    def test_replaces_previous_version(self):
+        collection = FakeCollection()
+        db = self.make_db(collection)
+        db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=4)
+        self.assertEqual(collection.events, [("delete", "ZMP_1.pdf"), ("insert", 4), ("insert", 2)])
+        self.assertEqual(len(collection.objects), 6)
+
+        # changed file with fewer pages
+        write_pdf(self.pdf, pages=1, lines_per_page=2)
+        os.utime(self.pdf, (0, 0))
+        collection.events.clear()
+        db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=4)
+        self.assertEqual(collection.events[0], ("delete", "ZMP_1.pdf"))
+        self.assertEqual(collection.events[-1], ("insert", 2))
+        self.assertEqual(len(collection.objects), 2)
+
+        # interrupted after the first batch
+        write_pdf(self.pdf, pages=3, lines_per_page=2)
+        checkpoint = self.checkpoint()
+        checkpoint.reset()
+        checkpoint.mark_batch(self.pdf, 0)
+        collection.events.clear()
+        db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=4)
+        self.assertEqual(collection.events, [("insert", 2)])
+
+
+    # a delete that keeps failing skips the file instead of aborting the run
+    def test_failed_delete_skips_file(self):
+        other = os.path.join(self.tmp.name, "ZMP_2.pdf")
+        write_pdf(other, pages=1, lines_per_page=2)
+        collection = FakeCollection(delete_script=[WeaviateBaseError("timed out")] * 5)
+        db = self.make_db(collection)
+        report = db.load_documents(uploaded_documents=[self.pdf, other], insert_batch_size=4)
+
+        self.assertIn(self.pdf, report.failed_files)
+        self.assertEqual(report.retries, 4)
+        self.assertEqual(report.processed_files, [other])
+        self.assertEqual(collection.sources(), ["ZMP_2.pdf", "ZMP_2.pdf"])
+        self.assertFalse(self.checkpoint().is_done(self.pdf))
+
+    # a transient error is retried
+    def test_delete_is_retried(self):
+        collection = FakeCollection(delete_script=[WeaviateBaseError("timed out")])
+        report = self.make_db(collection).load_documents(uploaded_documents=[self.pdf], insert_batch_size=4)
+        self.assertEqual(report.processed_files, [self.pdf])
+        self.assertEqual(report.retries, 1)
+
+    # pages are only read and chunked when their chunks are consumed
+    def test_iter_chunks_is_lazy(self):
+        db = self.make_db(FakeCollection())
+        with fitz.open(self.pdf) as doc:
+            chunks = db._iter_chunks(doc, self.pdf)
+            first = next(chunks)
+            self.assertEqual(db.chunker.pages, [0])
+            self.assertEqual((first.metadata["page"], first.metadata["chunk_index"]), (1, 0))
+            self.assertEqual(len([first, *chunks]), 6)
+            self.assertEqual(db.chunker.pages, [0, 1, 2])
+
+    # chunks are flushed in windows of insert_batch_size, stored windows are skipped on resume
+    def test_windows_and_resume(self):
+        db = self.make_db(FakeCollection())
+        windows = []
+        insert = lambda collection, docs, dead_letter, report: windows.append(len(docs)) or 0
+        with mock.patch.object(db, "_insert_batch", side_effect=insert):
+            db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=4)
+            self.assertEqual(windows, [4, 2])
+
+            checkpoint = self.checkpoint()
+            checkpoint.reset()
+            checkpoint.mark_batch(self.pdf, 0)
+            windows.clear()
+            report = db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=4)
+            self.assertEqual(windows, [2])
+            self.assertEqual(report.chunks_total, 6)
+            self.assertTrue(self.checkpoint().is_done(self.pdf))
+
+    # a failed OCR page keeps the file pending, later windows are not checkpointed
+    def test_failed_ocr_page(self):
+        with fitz.open(self.pdf) as doc:
+            doc.new_page()
+            doc.new_page()
+            doc.saveIncr()
+        collection = FakeCollection()
+        db = self.make_db(collection)
+        db.ocr = FakeOcr({3: "scan 3a\nscan 3b", 4: "scan 4a\nscan 4b"}, failing={3})
+        report = db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=2)
+
+        self.assertEqual(report.ocr_failed_pages, 1)
+        self.assertIn("OCR failed for pages 4", report.failed_files[self.pdf])
+        self.assertFalse(self.checkpoint().is_done(self.pdf))
+        self.assertEqual(self.checkpoint().batches_done(self.pdf), 3)
+
+        # the page is OCR'd on the next run and the file is completed
+        db.ocr = FakeOcr({3: "scan 3a\nscan 3b", 4: "scan 4a\nscan 4b"})
+        report = db.load_documents(uploaded_documents=[self.pdf], insert_batch_size=2)
+        self.assertEqual(report.failed_files, {})
+        self.assertTrue(self.checkpoint().is_done(self.pdf))
+        self.assertEqual(len(collection.objects), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""unittest-based tests for tenant scoping of knowledge bases - no Weaviate server needed."""
+
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.hybrid import check_kb_name
+from tests.fakes import make_db
+
+def hit(id_: str) -> SimpleNamespace:
+    return SimpleNamespace(uuid=id_)
+
+class TestKnowledgeBase(unittest.TestCase):
+
+    def test_global_collection(self):
+        db = make_db()
+        self.assertIsNone(db._collection().tenant)
+        self.assertEqual([c.tenant for c in db._collections()], [None])
+
+    def test_collections_per_tenant(self):
+        db = make_db(tenants=["manuals", "specs"])
+        self.assertEqual([c.tenant for c in db._collections()], ["manuals", "specs"])
+
+    # writes need exactly one knowledge base
+    def test_write_needs_single_tenant(self):
+        self.assertEqual(make_db(tenants=["manuals"])._collection().tenant, "manuals")
+        with self.assertRaises(ValueError):
+            make_db(tenants=["manuals", "specs"])._collection()
+
+    # scores are normalised per tenant, so tenants are merged by rank and cut to k
+    def test_search_all_merges_by_rank(self):
+        hits = {
+            "manuals": [(hit("m1"), 1.0), (hit("m2"), 0.9), (hit("shared"), 0.8)],
+            "specs": [(hit("s1"), 0.5), (hit("shared"), 0.4)],
+        }
+        db = make_db(tenants=["manuals", "specs"])
+        results = db._search_all(lambda collection: hits[collection.tenant], k=3)
+        # a chunk found in both knowledge bases ranks first, then the best hit of each
+        self.assertEqual([obj.uuid for obj, _ in results], ["shared", "m1", "s1"])
+
+    def test_kb_name(self):
+        self.assertEqual(check_kb_name("Manuals_2024-v2"), "Manuals_2024-v2")
+        for name in ("", "../etc", "with space", "x" * 65):
+            with self.assertRaises(ValueError):
+                check_kb_name(name)
+
+    # names are checked before Weaviate or a checkpoint path is touched
+    def test_kb_name_checked_on_drop_and_status(self):
+        db = make_db()
+        with self.assertRaises(ValueError):
+            db.drop_kb("../checkpoint")
+        with self.assertRaises(ValueError):
+            db.set_kb_status("../checkpoint", "inactive")
+
+
+if __name__ == "__main__":
+    unittest.main()
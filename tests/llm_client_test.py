@@ -0,0 +1,163 @@
+"""unittest-based tests for the shared LLM client layer against a local fake server."""
+
+import sys
+import json
+import time
+import threading
+import unittest
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# import core
+sys.path.append(str(Path(__file__).parent.parent))
+from openai import BadRequestError
+from core.integrations.client import ChainableLLM, ResilientLLM, FallbackLLM, TokenBucket
+
+class FakeProvider:
+    """OpenAI compatible /chat/completions endpoint that plays back a list of (status, headers) responses."""
+
+    def __init__(self, responses: list[tuple[int, dict]], content: str = "Atomic freefall"):
+        self.responses = list(responses)
+        self.content = content
+        self.requests = 0
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                provider.requests += 1
+                status, headers = provider.responses.pop(0) if provider.responses else (200, {})
+                if status == 200:
+                    body = {
+                        "id": "chatcmpl-test",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": "fake",
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": provider.content},
+                            "finish_reason": "stop",
+                        }],
+                    }
+                else:
+                    body = {"error": {"message": f"fake error {status}", "type": "fake"}}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def llm(self, name: str, **kwargs) -> ResilientLLM:
+        return ResilientLLM(name=name, api_key="test", model="fake", base_url=self.base_url,
+                            base_delay=0.01, **kwargs)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestResilientLLM(unittest.TestCase):
+    def setUp(self):
+        self.providers = []
+
+    def tearDown(self):
+        for provider in self.providers:
+            provider.close()
+
+    def provider(self, responses, content="Atomic freefall") -> FakeProvider:
+        provider = FakeProvider(responses, content)
+        self.providers.append(provider)
+        return provider
+
+    # 429 honours Retry-After and the request succeeds afterwards
+    def test_retry_after_429(self):
+        provider = self.provider([(429, {"Retry-After": "0.2"}), (200, {})])
+        llm = provider.llm("retry-429", max_retries=2)
+
+        started = time.monotonic()
+        response = llm("Hello")
+        self.assertEqual(response, "Atomic freefall")
+        self.assertEqual(provider.requests, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_retry_5xx(self):
+        provider = self.provider([(503, {}), (502, {}), (200, {})])
+        llm = provider.llm("retry-5xx", max_retries=3)
+        self.assertEqual(llm.get_response("Hello"), "Atomic freefall")
+        self.assertEqual(provider.requests, 3)
+
+    # client errors are not retried
+    def test_no_retry_on_400(self):
+        provider = self.provider([(400, {})])
+        llm = provider.llm("no-retry", max_retries=3)
+        with self.assertRaises(BadRequestError):
+            llm.get_response("Hello")
+        self.assertEqual(provider.requests, 1)
+
+    # primary keeps failing -> secondary answers
+    def test_fallback(self):
+        primary = self.provider([(500, {})] * 3)
+        secondary = self.provider([], content="from fallback")
+        llm = FallbackLLM([primary.llm("primary", max_retries=1), secondary.llm("secondary")])
+
+        self.assertEqual(llm("Hello"), "from fallback")
+        self.assertEqual(primary.requests, 2)
+        self.assertEqual(secondary.requests, 1)
+
+    # a Retry-After above max_delay is not retried early, the next provider answers
+    def test_long_retry_after_fails_over(self):
+        primary = self.provider([(429, {"Retry-After": "60"})])
+        secondary = self.provider([], content="from fallback")
+        llm = FallbackLLM([primary.llm("long-retry-after", max_retries=2), secondary.llm("secondary-429")])
+
+        started = time.monotonic()
+        self.assertEqual(llm("Hello"), "from fallback")
+        self.assertEqual(primary.requests, 1)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_get_response_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ChainableLLM()
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(5):
+            with bucket:
+                pass
+        # first token is free, the other four need 1/20 s each
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_no_limit(self):
+        bucket = TokenBucket(rate=0)
+        started = time.monotonic()
+        for _ in range(50):
+            with bucket:
+                pass
+        self.assertLess(time.monotonic() - started, 0.1)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=-1)
+
+    def test_pause(self):
+        bucket = TokenBucket(rate=1000, capacity=10)
+        bucket.pause(0.2)
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
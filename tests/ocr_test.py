@@ -0,0 +1,108 @@
+"""unittest-based tests for the OCR page cache and page selection - no Tesseract needed."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from concurrent.futures import Future
+from unittest import mock
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+import fitz
+from db.ocr import OcrCache, PageOcr, page_hash
+
+def add_image_page(doc: fitz.Document, value: int):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 16, 16), 0)
+    pix.clear_with(value)
+    doc.new_page().insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pix)
+
+# Process pool stand-in - page index -> text, or the exception the worker raised
+class FakePool:
+
+    def __init__(self, results: dict):
+        self.results = results
+
+    def submit(self, fn, file_path, page_index, dpi, language):
+        future = Future()
+        result = self.results[page_index]
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+        return future
+
+    def shutdown(self):
+        pass
+
+class TestOcr(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "scan.pdf")
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "Product code 4050300006741")
+        add_image_page(doc, 0)
+        add_image_page(doc, 255)
+        add_image_page(doc, 0)
+        doc.save(self.path)
+        doc.close()
+        self.doc = fitz.open(self.path)
+
+    def tearDown(self):
+        self.doc.close()
+        self.tmp.cleanup()
+
+    def test_cache_roundtrip(self):
+        cache = OcrCache(os.path.join(self.tmp.name, "cache"))
+        self.assertIsNone(cache.get("ab12"))
+        cache.put("ab12", "Leuchtstofflampe")
+        self.assertEqual(cache.get("ab12"), "Leuchtstofflampe")
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "cache", "ab")), ["ab12.txt"])
+
+    # same page content -> same key, different image or settings -> different key
+    def test_page_hash(self):
+        key = page_hash(self.doc, self.doc[1], 300, "deu")
+        self.assertEqual(key, page_hash(self.doc, self.doc[3], 300, "deu"))
+        self.assertNotEqual(key, page_hash(self.doc, self.doc[2], 300, "deu"))
+        self.assertNotEqual(key, page_hash(self.doc, self.doc[1], 200, "deu"))
+        self.assertNotEqual(key, page_hash(self.doc, self.doc[1], 300, "eng"))
+
+    # pages without images are skipped and cached pages never start the process pool
+    def test_recognise_uses_cache(self):
+        ocr = PageOcr()
+        ocr.enabled = True
+        ocr.cache = OcrCache(os.path.join(self.tmp.name, "cache"))
+        for page_index in (1, 2):
+            ocr.cache.put(page_hash(self.doc, self.doc[page_index], ocr.dpi, ocr.language), f"page {page_index}")
+
+        with mock.patch("db.ocr.ocr_available", return_value=True):
+            results = list(ocr.recognise(self.doc, self.path, [0, 1, 2]))
+
+        self.assertEqual(results, [(1, "page 1"), (2, "page 2")])
+        self.assertIsNone(ocr.pool)
+
+    # a failing page is reported and not cached, the other pages are still returned
+    def test_recognise_reports_failures(self):
+        ocr = PageOcr()
+        ocr.enabled = True
+        ocr.cache = OcrCache(os.path.join(self.tmp.name, "cache"))
+        ocr.pool = FakePool({1: RuntimeError("tesseract crashed"), 2: "page 2"})
+        failed = []
+
+        with mock.patch("db.ocr.ocr_available", return_value=True):
+            results = list(ocr.recognise(self.doc, self.path, [1, 2], failed))
+
+        self.assertEqual(results, [(2, "page 2")])
+        self.assertEqual(failed, [1])
+        self.assertIsNone(ocr.cache.get(page_hash(self.doc, self.doc[1], ocr.dpi, ocr.language)))
+
+    def test_recognise_disabled(self):
+        ocr = PageOcr()
+        ocr.enabled = False
+        self.assertEqual(list(ocr.recognise(self.doc, self.path, [1, 2])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
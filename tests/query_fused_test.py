@@ -0,0 +1,71 @@
+"""unittest-based tests for query_fused - parallel legs, per-leg deadlines and fallback to one leg, no Weaviate server needed."""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from weaviate.exceptions import WeaviateBaseError
+from tests.fakes import FakeCollection, make_db
+
+CHUNKS = [
+    {"source": "ZMP_1.pdf", "page": 1, "text": "Leuchtstofflampe T8 58W"},
+    {"source": "ZMP_2.pdf", "page": 1, "text": "LED Panel 600x600"},
+    {"source": "ZMP_3.pdf", "page": 2, "text": "Leuchtstofflampe T5 35W"},
+]
+
+class TestQueryFused(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = FakeCollection(CHUNKS)
+        self.db = make_db(self.collection)
+
+    # texts of the returned documents and the seconds the call took
+    def query(self, **kwargs) -> tuple[list[str], float]:
+        started = time.monotonic()
+        docs = self.db.query_fused("Leuchtstofflampe T8", k=3, **kwargs)
+        return [doc.page_content for doc in docs], time.monotonic() - started
+
+    def test_fuses_both_legs(self):
+        texts, _ = self.query()
+        # found by both legs first, the LED panel only by the vector leg
+        self.assertEqual(texts, ["Leuchtstofflampe T8 58W", "Leuchtstofflampe T5 35W", "LED Panel 600x600"])
+
+    # the legs run at the same time, so the call takes as long as the slower leg
+    def test_legs_run_in_parallel(self):
+        self.collection.leg_delays = {"bm25": 0.3, "near_vector": 0.3}
+        texts, elapsed = self.query()
+        self.assertEqual(len(texts), 3)
+        self.assertLess(elapsed, 0.5)
+
+    # a leg that misses its deadline is not waited for, the other leg's results are returned
+    def test_slow_vector_leg_is_cut_off(self):
+        self.collection.leg_delays = {"near_vector": 1.0}
+        texts, elapsed = self.query(vector_timeout=0.2)
+        self.assertEqual(texts, ["Leuchtstofflampe T8 58W", "Leuchtstofflampe T5 35W"])
+        self.assertLess(elapsed, 0.6)
+
+    def test_slow_bm25_leg_is_cut_off(self):
+        self.collection.leg_delays = {"bm25": 1.0}
+        texts, elapsed = self.query(bm25_timeout=0.2)
+        self.assertEqual(texts, [chunk["text"] for chunk in CHUNKS])
+        self.assertLess(elapsed, 0.6)
+
+    def test_failing_leg(self):
+        self.collection.leg_errors = {"bm25": WeaviateBaseError("bm25 failed")}
+        texts, _ = self.query()
+        self.assertEqual(texts, [chunk["text"] for chunk in CHUNKS])
+
+    def test_both_legs_fail(self):
+        self.collection.leg_errors = {"bm25": WeaviateBaseError("bm25 failed")}
+        self.collection.leg_delays = {"near_vector": 1.0}
+        started = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            self.db.query_fused("Leuchtstofflampe", vector_timeout=0.2)
+        self.assertLess(time.monotonic() - started, 0.6)
+
+
+if __name__ == "__main__":
+    unittest.main()
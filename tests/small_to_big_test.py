@@ -0,0 +1,41 @@
+"""unittest-based tests for merging neighbouring chunks in small-to-big retrieval."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from langchain_core.documents import Document
+from db.hybrid import HybridDB, chunk_uuid
+
+PAGE_TEXT = "Product code | STK number\n4050300006741 | 4739434\n4050300006710 | 4736533"
+
+def chunk(index: int, start: int, end: int) -> Document:
+    return Document(
+        page_content=PAGE_TEXT[start:end],
+        metadata={"source": "ZMP_56131.pdf", "page": 3, "chunk_index": index, "page_chunks": 4, "start": start, "end": end},
+    )
+
+class TestSmallToBig(unittest.TestCase):
+    # overlapping text of neighbours is kept only once
+    def test_merge_overlap(self):
+        merged = HybridDB._merge_adjacent([chunk(1, 20, 60), chunk(0, 0, 30)])
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged[0].page_content, PAGE_TEXT[0:60])
+        self.assertEqual(merged[0].metadata["chunk_index"], 0)
+        self.assertEqual(merged[0].metadata["last_chunk_index"], 1)
+
+    # chunks that are not next to each other stay separate
+    def test_gap(self):
+        merged = HybridDB._merge_adjacent([chunk(0, 0, 25), chunk(2, 26, 49), chunk(3, 50, 73)])
+        self.assertEqual([d.metadata["chunk_index"] for d in merged], [0, 2])
+        self.assertEqual(merged[1].page_content, PAGE_TEXT[26:49] + "\n" + PAGE_TEXT[50:73])
+
+    def test_chunk_uuid_is_positional(self):
+        self.assertEqual(chunk_uuid("ZMP_56131.pdf", 3, 1), chunk_uuid("ZMP_56131.pdf", 3, 1))
+        self.assertNotEqual(chunk_uuid("ZMP_56131.pdf", 3, 1), chunk_uuid("ZMP_56131.pdf", 3, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
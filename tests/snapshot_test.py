@@ -0,0 +1,80 @@
+"""unittest-based tests for snapshot export / import with a fake collection."""
+
+import os
+import sys
+import uuid
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.snapshot import export_snapshot, import_snapshot, read_manifest
+
+class FakeBatch:
+    def __init__(self, store: dict):
+        self.store = store
+        self.failed_objects = []
+
+    def fixed_size(self, batch_size: int):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_object(self, properties, uuid, vector):
+        self.store[uuid] = (properties, vector)
+
+class FakeCollection:
+    def __init__(self, objects=None):
+        self.objects = objects or []
+        self.store = {}
+        self.batch = FakeBatch(self.store)
+
+    def iterator(self, include_vector=False):
+        return iter(self.objects)
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snapshot.npz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        objects = [
+            SimpleNamespace(
+                uuid=uuid.uuid4(),
+                properties={"text": f"Produktcode 40503000067{i:02d}\nXENOPHOT", "source": "ZMP_1006715.pdf", "page": i, "end": None},
+                vector={"default": [i / 10, 0.5, -0.25]},
+            )
+            for i in range(7)
+        ]
+        source = FakeCollection(objects)
+        self.assertEqual(export_snapshot(source, self.path, {"embedding_model": "BAAI/bge-m3"}, shard_size=3), 7)
+
+        manifest = read_manifest(self.path)
+        self.assertEqual(manifest["count"], 7)
+        self.assertEqual(manifest["shards"], 3)
+        self.assertEqual(manifest["dimensions"], 3)
+
+        target = FakeCollection()
+        self.assertEqual(import_snapshot(target, self.path), (7, 0))
+        for obj in objects:
+            properties, vector = target.store[str(obj.uuid)]
+            self.assertEqual(properties, {k: v for k, v in obj.properties.items() if v is not None})
+            for a, b in zip(vector, obj.vector["default"]):
+                self.assertAlmostEqual(a, b, places=6)
+
+    def test_empty_collection(self):
+        self.assertEqual(export_snapshot(FakeCollection(), self.path, {}), 0)
+        self.assertEqual(import_snapshot(FakeCollection(), self.path), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
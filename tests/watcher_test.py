@@ -0,0 +1,118 @@
+"""unittest-based tests for the folder watcher (polling mode, no database needed)."""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from queue import Empty
+
+# import db
+sys.path.append(str(Path(__file__).parent.parent))
+from db.watcher import FolderWatcher, Observer
+
+class FakeDB:
+    def __init__(self):
+        self.loaded = []
+        self.deleted = []
+
+    def load_documents(self, uploaded_documents=None):
+        self.loaded.extend(os.path.basename(path) for path in uploaded_documents)
+
+    def delete_source(self, source):
+        self.deleted.append(os.path.basename(source))
+        return 0
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "data")
+        os.makedirs(self.folder)
+        self.db = FakeDB()
+        self.watcher = FolderWatcher(
+            self.db, self.folder, debounce=1.0, poll_interval=0.0, use_polling=True,
+            checkpoint_path=os.path.join(self.tmp.name, "checkpoint.json"),
+        )
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes, mode: str = "wb"):
+        with open(os.path.join(self.folder, name), mode) as f:
+            f.write(data)
+
+    # a file is only ingested after it stopped changing
+    def test_debounce_partial_write(self):
+        self.write("ZMP_1.pdf", b"%PDF-1.4 part")
+        self.watcher.tick(now=10.0)
+        self.write("ZMP_1.pdf", b" more", mode="ab")
+        self.watcher.tick(now=11.0)
+        self.assertEqual(self.db.loaded, [])
+
+        self.watcher.tick(now=12.5)
+        self.assertEqual(self.db.loaded, ["ZMP_1.pdf"])
+
+    def test_ignores_other_files(self):
+        self.write("notes.txt", b"hello")
+        self.watcher.tick(now=10.0)
+        self.watcher.tick(now=20.0)
+        self.assertEqual(self.db.loaded, [])
+
+    def test_delete(self):
+        self.write("ZMP_2.pdf", b"%PDF-1.4")
+        self.watcher.tick(now=10.0)
+        self.watcher.tick(now=20.0)
+        os.remove(os.path.join(self.folder, "ZMP_2.pdf"))
+        self.watcher.tick(now=30.0)
+        self.watcher.tick(now=40.0)
+        self.assertEqual(self.db.loaded, ["ZMP_2.pdf"])
+        self.assertEqual(self.db.deleted, ["ZMP_2.pdf"])
+
+
+@unittest.skipIf(Observer is None, "watchdog is not installed")
+class TestFileSystemEvents(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "data")
+        os.makedirs(self.folder)
+        self.path = os.path.join(self.folder, "ZMP_1.pdf")
+        with open(self.path, "wb") as f:
+            f.write(b"%PDF-1.4")
+        self.watcher = FolderWatcher(
+            FakeDB(), self.folder, checkpoint_path=os.path.join(self.tmp.name, "checkpoint.json"),
+        )
+        self.watcher.start()
+        # the file is queued once by the catch-up at startup
+        self.assertEqual(self.queued(0.2), [self.path])
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tmp.cleanup()
+
+    # paths queued by the observer within `wait` seconds
+    def queued(self, wait: float) -> list[str]:
+        time.sleep(wait)
+        paths = []
+        while True:
+            try:
+                paths.append(self.watcher.events.get_nowait())
+            except Empty:
+                return paths
+
+    # load_documents or a PDF viewer reading the file does not queue it again
+    def test_read_only_open(self):
+        with open(self.path, "rb") as f:
+            f.read()
+        self.assertEqual(self.queued(0.5), [])
+
+    def test_write_is_queued(self):
+        with open(self.path, "ab") as f:
+            f.write(b" more")
+        self.assertIn(self.path, self.queued(0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()